@@ -0,0 +1,104 @@
+import bisect
+from typing import NamedTuple
+
+import math
+
+from processor import Processor
+from task import Task
+
+FIRST_FIT = "first-fit"
+BEST_FIT = "best-fit"
+WORST_FIT = "worst-fit"
+CRITICALITY_AWARE_BEST_FIT = "criticality-aware-best-fit"
+
+
+class AllocationException(Exception):
+    pass
+
+
+class AllocationResult(NamedTuple):
+    allocated: bool
+    unassigned_task: Task | None = None
+
+
+class SortedProcessors:
+    """Processor positions sorted by remaining utilization, ties broken by position."""
+
+    def __init__(self, processors: list[Processor]):
+        self.remaining_utils = [processor.get_remaining_util() for processor in processors]
+        self.keys = sorted(
+            (remaining_util, position) for position, remaining_util in enumerate(self.remaining_utils)
+        )
+
+    def best_fit(self, util: float) -> int | None:
+        index = bisect.bisect_left(self.keys, (util, -1))
+        return self.keys[index][1] if index < len(self.keys) else None
+
+    def worst_fit(self, util: float) -> int | None:
+        if not self.keys or self.keys[-1][0] < util:
+            return None
+        return self.keys[bisect.bisect_left(self.keys, (self.keys[-1][0], -1))][1]
+
+    def update(self, position: int, remaining_util: float) -> None:
+        del self.keys[bisect.bisect_left(self.keys, (self.remaining_utils[position], position))]
+        bisect.insort(self.keys, (remaining_util, position))
+        self.remaining_utils[position] = remaining_util
+
+
+class FirstFitTree:
+    """Max segment tree over remaining utilization, to find the first processor a task fits on."""
+
+    def __init__(self, processors: list[Processor]):
+        self.size = 1
+        while self.size < len(processors):
+            self.size *= 2
+        self.tree = [-math.inf] * (2 * self.size)
+        for position, processor in enumerate(processors):
+            self.tree[self.size + position] = processor.get_remaining_util()
+        for node in range(self.size - 1, 0, -1):
+            self.tree[node] = max(self.tree[2 * node], self.tree[2 * node + 1])
+
+    def first_fit(self, util: float) -> int | None:
+        if self.tree[1] < util:
+            return None
+        node = 1
+        while node < self.size:
+            node = 2 * node if self.tree[2 * node] >= util else 2 * node + 1
+        return node - self.size
+
+    def update(self, position: int, remaining_util: float) -> None:
+        node = self.size + position
+        self.tree[node] = remaining_util
+        while node > 1:
+            node //= 2
+            self.tree[node] = max(self.tree[2 * node], self.tree[2 * node + 1])
+
+
+def allocate(tasks: list[Task], processors: list[Processor], heuristic: str = BEST_FIT) -> AllocationResult:
+    """Assigns every task, largest utilization first, to a processor chosen by `heuristic`.
+
+    Stops at the first task that fits on no processor; the tasks placed before it stay assigned.
+    """
+    tasks = sorted(tasks, key=lambda t: t.util, reverse=True)
+    if heuristic == FIRST_FIT:
+        index = FirstFitTree(processors)
+        find = index.first_fit
+    elif heuristic in (BEST_FIT, CRITICALITY_AWARE_BEST_FIT):
+        index = SortedProcessors(processors)
+        find = index.best_fit
+        if heuristic == CRITICALITY_AWARE_BEST_FIT:
+            tasks.sort(key=lambda t: not t.high_criticality)
+    elif heuristic == WORST_FIT:
+        index = SortedProcessors(processors)
+        find = index.worst_fit
+    else:
+        raise ValueError(f"unknown allocation heuristic {heuristic!r}")
+
+    for task in tasks:
+        position = find(task.util)
+        if position is None:
+            return AllocationResult(allocated=False, unassigned_task=task)
+        processor = processors[position]
+        processor.assign_task(task)
+        index.update(position, processor.get_remaining_util())
+    return AllocationResult(allocated=True)
@@ -0,0 +1,196 @@
+import math
+from array import array
+from typing import Iterable, NamedTuple
+
+from config import ERROR_MARGIN
+from job import Job
+
+APERIODIC = "aperiodic"
+LOW_CRITICALITY = "low"
+HIGH_CRITICALITY = "high"
+# Indexed by the kind column.
+LEVELS = (APERIODIC, LOW_CRITICALITY, HIGH_CRITICALITY)
+PERCENTILES = (50, 90, 99)
+NO_PROCESSOR = -1
+
+
+def job_kind(job: Job) -> int:
+    if not job.is_periodic:
+        return 0
+    return 2 if job.task.high_criticality else 1
+
+
+def quality_points(finish: float, deadline: float) -> float:
+    if finish <= deadline:
+        return 100
+    return max(0, 100 - 10 * (finish - deadline))
+
+
+def quality_of_service(jobs: Iterable[Job]) -> float:
+    """Mean quality of the aperiodic and low criticality jobs; dropped and unfinished ones score 0."""
+    total = 0
+    count = 0
+    for job in jobs:
+        if job.is_periodic and job.task.high_criticality:
+            continue
+        count += 1
+        finish = job.finish_time
+        if finish is None or job.record.dropped:
+            continue
+        total += quality_points(finish, job.deadline)
+    return total / count if count else 0
+
+
+class JobColumns:
+    """Scheduled jobs as one array per attribute, NaN marking a job that never finished.
+
+    `deadline` is the real deadline, the end of the period for periodic jobs rather than the virtual
+    deadline EDF-VD schedules high criticality jobs by.
+    """
+
+    __slots__ = ("release", "deadline", "finish", "kind", "dropped", "processor")
+
+    def __init__(self):
+        self.release = array("d")
+        self.deadline = array("d")
+        self.finish = array("d")
+        self.kind = array("b")
+        self.dropped = array("b")
+        self.processor = array("i")
+
+    @classmethod
+    def from_jobs(cls, jobs: Iterable[Job], processor_id: int = NO_PROCESSOR) -> "JobColumns":
+        columns = cls()
+        columns.extend(jobs, processor_id)
+        return columns
+
+    def extend(self, jobs: Iterable[Job], processor_id: int = NO_PROCESSOR) -> None:
+        start = len(self.release)
+        for job in jobs:
+            self.release.append(job.release_time)
+            self.deadline.append(job.release_time + job.task.period if job.is_periodic else job.deadline)
+            finish = job.finish_time
+            self.finish.append(math.nan if finish is None else finish)
+            self.kind.append(job_kind(job))
+            self.dropped.append(job.record.dropped)
+        self.processor.extend([processor_id] * (len(self.release) - start))
+
+    def __len__(self) -> int:
+        return len(self.release)
+
+
+class LevelAnalytics(NamedTuple):
+    jobs: int
+    finished: int
+    dropped: int
+    # Finished later than the deadline; jobs that never ran (rejected or never dispatched) are not misses.
+    misses: int
+
+    @property
+    def miss_ratio(self) -> float:
+        return self.misses / self.finished if self.finished else 0
+
+    @property
+    def drop_rate(self) -> float:
+        return self.dropped / self.jobs if self.jobs else 0
+
+
+class Distribution(NamedTuple):
+    count: int
+    mean: float
+    max: float
+    percentiles: dict[int, float]
+
+
+class ScheduleAnalytics(NamedTuple):
+    jobs: int
+    quality_of_service: float
+    levels: dict[str, LevelAnalytics]
+    drop_rate: float
+    # Of the finished jobs that were not dropped; tardiness is 0 for a job that met its deadline.
+    tardiness: Distribution
+    response_time: Distribution
+    processors: dict[int, "ScheduleAnalytics"]
+
+
+def percentile(sorted_values: list[float], q: float) -> float:
+    if not sorted_values:
+        return math.nan
+    position = (len(sorted_values) - 1) * q / 100
+    lower = math.floor(position)
+    upper = min(lower + 1, len(sorted_values) - 1)
+    return sorted_values[lower] + (sorted_values[upper] - sorted_values[lower]) * (position - lower)
+
+
+def distribution(values: list[float]) -> Distribution:
+    if not values:
+        return Distribution(count=0, mean=math.nan, max=math.nan, percentiles={q: math.nan for q in PERCENTILES})
+    values.sort()
+    return Distribution(
+        count=len(values),
+        mean=math.fsum(values) / len(values),
+        max=values[-1],
+        percentiles={q: percentile(values, q) for q in PERCENTILES},
+    )
+
+
+def analyze(columns: JobColumns, by_processor: bool = True) -> ScheduleAnalytics:
+    """Computes every statistic of the schedule in one pass over the columns.
+
+    The quality of service matches calculate_quality_of_service for the same jobs. With `by_processor`,
+    the jobs of each processor id are also analyzed on their own.
+    """
+    return _analyze(columns, range(len(columns)), by_processor)
+
+
+def _analyze(columns: JobColumns, rows: Iterable[int], by_processor: bool) -> ScheduleAnalytics:
+    release, deadline, finish = columns.release, columns.deadline, columns.finish
+    kind, dropped, processor = columns.kind, columns.dropped, columns.processor
+    jobs = [0, 0, 0]
+    finished = [0, 0, 0]
+    drops = [0, 0, 0]
+    misses = [0, 0, 0]
+    quality_total = 0
+    tardiness = []
+    response_times = []
+    processor_rows: dict[int, list[int]] = {}
+
+    for row in rows:
+        level = kind[row]
+        jobs[level] += 1
+        if by_processor and processor[row] != NO_PROCESSOR:
+            processor_rows.setdefault(processor[row], []).append(row)
+        if dropped[row]:
+            drops[level] += 1
+            continue
+        finish_time = finish[row]
+        if finish_time != finish_time:
+            continue
+        finished[level] += 1
+        late_by = finish_time - deadline[row]
+        if late_by > ERROR_MARGIN:
+            misses[level] += 1
+        if level != 2:
+            quality_total += quality_points(finish_time, deadline[row])
+        tardiness.append(late_by if late_by > 0 else 0.0)
+        response_times.append(finish_time - release[row])
+
+    total_jobs = sum(jobs)
+    low_priority_jobs = jobs[0] + jobs[1]
+    return ScheduleAnalytics(
+        jobs=total_jobs,
+        quality_of_service=quality_total / low_priority_jobs if low_priority_jobs else 0,
+        levels={
+            name: LevelAnalytics(
+                jobs=jobs[level], finished=finished[level], dropped=drops[level], misses=misses[level]
+            )
+            for level, name in enumerate(LEVELS)
+        },
+        drop_rate=sum(drops) / total_jobs if total_jobs else 0,
+        tardiness=distribution(tardiness),
+        response_time=distribution(response_times),
+        processors={
+            processor_id: _analyze(columns, processor_job_rows, by_processor=False)
+            for processor_id, processor_job_rows in sorted(processor_rows.items())
+        },
+    )
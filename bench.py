@@ -0,0 +1,328 @@
+import argparse
+import json
+import math
+import os
+import platform
+import random
+import statistics
+import sys
+import tempfile
+import time
+import tracemalloc
+from typing import Callable, NamedTuple
+
+from config import PERIODS
+from main import allocate_processors_to_tasks, calculate_quality_of_service, create_aperiodic_jobs, create_tasks, \
+    schedule, uunifast
+from processor import Processor
+from utilization_cache import utilization_cache
+from utils import get_periods
+
+BENCHMARK_SEED = 2024
+PROCESSOR_COUNTS = [2, 4, 8, 16, 32, 64]
+TASK_COUNTS = [12, 50, 200, 1000]
+APERIODIC_JOB_COUNTS = [40, 200, 1000]
+DEFAULT_PROCESSORS = 8
+DEFAULT_TASKS = 12
+DEFAULT_APERIODIC_JOBS = 40
+OVERRUN_PROBABILITY = 0.2
+UTILIZATION_PER_PROCESSOR = 0.5
+REGRESSION_THRESHOLD = 0.2
+
+
+class BenchmarkCase(NamedTuple):
+    sweep: str
+    function: str
+    processors: int
+    tasks: int
+    aperiodic_jobs: int
+
+    @property
+    def key(self) -> str:
+        return f"{self.function}[processors={self.processors},tasks={self.tasks},aperiodic={self.aperiodic_jobs}]"
+
+
+class BenchmarkResult(NamedTuple):
+    key: str
+    function: str
+    params: dict
+    runs: int
+    wall_time_min: float
+    wall_time_median: float
+    # Net blocks and bytes the measured call left allocated, and the peak traced memory during the call.
+    retained_blocks: int
+    allocated_bytes: int
+    peak_memory: int
+
+
+class Regression(NamedTuple):
+    key: str
+    metric: str
+    baseline: float
+    current: float
+
+    @property
+    def ratio(self) -> float:
+        return self.current / self.baseline if self.baseline else math.inf
+
+
+class System(NamedTuple):
+    processors: list[Processor]
+    aperiodic_jobs: list
+    hyper_period: int
+
+
+def build_system(case: BenchmarkCase) -> System:
+    random.seed(BENCHMARK_SEED)
+    task_utils = uunifast(tasks_count=case.tasks, utilization=UTILIZATION_PER_PROCESSOR * case.processors)
+    tasks = create_tasks(task_utils=task_utils, task_periods=get_periods(n=case.tasks, periods_list=PERIODS))
+    hyper_period = math.lcm(*[task.period for task in tasks])
+    processors = [Processor(OVERRUN_PROBABILITY) for _ in range(case.processors)]
+    allocate_processors_to_tasks(tasks=tasks, processors=processors)
+    for processor in processors:
+        processor.calculate_server_utilization()
+    aperiodic_jobs = create_aperiodic_jobs(count=case.aperiodic_jobs, hyper_period=hyper_period)
+    return System(processors=processors, aperiodic_jobs=aperiodic_jobs, hyper_period=hyper_period)
+
+
+def admit_aperiodic_jobs(system: System) -> list:
+    aperiodic_jobs = list(system.aperiodic_jobs)
+    all_jobs = []
+    for processor in system.processors:
+        processor.prepare_schedule(until=system.hyper_period)
+        selected_jobs = [job for job in aperiodic_jobs if processor.try_admit(job)]
+        for job in selected_jobs:
+            aperiodic_jobs.remove(job)
+        all_jobs += processor.scheduled_jobs
+    return all_jobs + aperiodic_jobs
+
+
+# Each setup prepares fresh inputs outside the measurement and returns the call to measure.
+
+def setup_uunifast(case: BenchmarkCase) -> Callable[[], object]:
+    random.seed(BENCHMARK_SEED)
+    return lambda: uunifast(tasks_count=case.tasks, utilization=UTILIZATION_PER_PROCESSOR * case.processors)
+
+
+def setup_create_tasks(case: BenchmarkCase) -> Callable[[], object]:
+    random.seed(BENCHMARK_SEED)
+    task_utils = uunifast(tasks_count=case.tasks, utilization=UTILIZATION_PER_PROCESSOR * case.processors)
+    task_periods = get_periods(n=case.tasks, periods_list=PERIODS)
+    return lambda: create_tasks(task_utils=task_utils, task_periods=task_periods)
+
+
+def setup_allocate(case: BenchmarkCase) -> Callable[[], object]:
+    random.seed(BENCHMARK_SEED)
+    tasks = create_tasks(
+        task_utils=uunifast(tasks_count=case.tasks, utilization=UTILIZATION_PER_PROCESSOR * case.processors),
+        task_periods=get_periods(n=case.tasks, periods_list=PERIODS),
+    )
+    processors = [Processor(OVERRUN_PROBABILITY) for _ in range(case.processors)]
+    return lambda: allocate_processors_to_tasks(tasks=tasks, processors=processors)
+
+
+def setup_create_all_jobs(case: BenchmarkCase) -> Callable[[], object]:
+    system = build_system(case)
+    return lambda: [processor.create_all_jobs(system.hyper_period) for processor in system.processors]
+
+
+def setup_edf_schedule_jobs(case: BenchmarkCase) -> Callable[[], object]:
+    system = build_system(case)
+    for processor in system.processors:
+        processor.jobs = processor.create_all_jobs(system.hyper_period)
+    return lambda: [processor.edf_schedule_jobs(system.hyper_period) for processor in system.processors]
+
+
+def setup_aperiodic_admission(case: BenchmarkCase) -> Callable[[], object]:
+    system = build_system(case)
+    return lambda: admit_aperiodic_jobs(system)
+
+
+def setup_quality_of_service(case: BenchmarkCase) -> Callable[[], object]:
+    jobs = admit_aperiodic_jobs(build_system(case))
+    return lambda: calculate_quality_of_service(jobs)
+
+
+def setup_schedule(case: BenchmarkCase) -> Callable[[], object]:
+    random.seed(BENCHMARK_SEED)
+    return lambda: schedule(
+        overrun_probability=OVERRUN_PROBABILITY, sum_util=UTILIZATION_PER_PROCESSOR * case.processors,
+        number_of_aperiodic_jobs=case.aperiodic_jobs, number_of_processors=case.processors,
+    )
+
+
+SETUPS: dict[str, Callable[[BenchmarkCase], Callable[[], object]]] = {
+    "uunifast": setup_uunifast,
+    "create_tasks": setup_create_tasks,
+    "allocate_processors_to_tasks": setup_allocate,
+    "create_all_jobs": setup_create_all_jobs,
+    "edf_schedule_jobs": setup_edf_schedule_jobs,
+    "aperiodic_admission": setup_aperiodic_admission,
+    "calculate_quality_of_service": setup_quality_of_service,
+    "schedule": setup_schedule,
+}
+
+
+def benchmark_cases() -> list[BenchmarkCase]:
+    """One sweep per dimension around the default point, each over the functions that depend on it.
+
+    The processor sweep scales the task count with the processors, since a total utilization of half
+    the processors does not fit in a dozen tasks once there are more than 24 processors.
+    """
+    cases = []
+    for tasks in TASK_COUNTS:
+        for function in ("uunifast", "create_tasks", "allocate_processors_to_tasks", "create_all_jobs",
+                         "edf_schedule_jobs"):
+            cases.append(BenchmarkCase("tasks", function, DEFAULT_PROCESSORS, tasks, DEFAULT_APERIODIC_JOBS))
+    for processors in PROCESSOR_COUNTS:
+        tasks = max(DEFAULT_TASKS, 4 * processors)
+        for function in ("allocate_processors_to_tasks", "edf_schedule_jobs", "aperiodic_admission"):
+            cases.append(BenchmarkCase("processors", function, processors, tasks, DEFAULT_APERIODIC_JOBS))
+    for aperiodic_jobs in APERIODIC_JOB_COUNTS:
+        for function in ("aperiodic_admission", "calculate_quality_of_service"):
+            cases.append(BenchmarkCase("aperiodic", function, DEFAULT_PROCESSORS, DEFAULT_TASKS, aperiodic_jobs))
+    for processors in PROCESSOR_COUNTS[:4]:
+        cases.append(BenchmarkCase("processors", "schedule", processors, DEFAULT_TASKS, DEFAULT_APERIODIC_JOBS))
+
+    seen, unique_cases = set(), []
+    for case in cases:
+        if case.key not in seen:
+            seen.add(case.key)
+            unique_cases.append(case)
+    return unique_cases
+
+
+def run_case(case: BenchmarkCase, repeat: int) -> BenchmarkResult:
+    setup = SETUPS[case.function]
+    times = []
+    for _ in range(repeat):
+        call = setup(case)
+        start = time.perf_counter()
+        call()
+        times.append(time.perf_counter() - start)
+
+    # Tracing slows every allocation down, so memory is measured in a separate, untimed run.
+    call = setup(case)
+    tracemalloc.start()
+    try:
+        before = tracemalloc.take_snapshot()
+        tracemalloc.reset_peak()
+        base_memory = tracemalloc.get_traced_memory()[0]
+        result = call()
+        current_memory, peak_memory = tracemalloc.get_traced_memory()
+        after = tracemalloc.take_snapshot()
+    finally:
+        tracemalloc.stop()
+    del result
+    difference = after.compare_to(before, "filename")
+
+    return BenchmarkResult(
+        key=case.key,
+        function=case.function,
+        params=dict(processors=case.processors, tasks=case.tasks, aperiodic_jobs=case.aperiodic_jobs),
+        runs=repeat,
+        wall_time_min=min(times),
+        wall_time_median=statistics.median(times),
+        retained_blocks=sum(stat.count_diff for stat in difference),
+        allocated_bytes=current_memory - base_memory,
+        peak_memory=peak_memory - base_memory,
+    )
+
+
+def run_benchmarks(
+        cases: list[BenchmarkCase], repeat: int, progress: Callable[[str], None] = print
+) -> list[BenchmarkResult]:
+    results = []
+    for case in cases:
+        results.append(run_case(case, repeat))
+        progress(f"{case.key}: {results[-1].wall_time_median * 1000:.2f} ms")
+    return results
+
+
+def save_results(path: str, results: list[BenchmarkResult]) -> None:
+    document = {
+        "python": platform.python_version(),
+        "platform": platform.platform(),
+        "seed": BENCHMARK_SEED,
+        "results": [result._asdict() for result in results],
+    }
+    with open(path, "w") as file:
+        json.dump(document, file, indent=2)
+
+
+def load_results(path: str) -> dict[str, dict]:
+    with open(path) as file:
+        return {result["key"]: result for result in json.load(file)["results"]}
+
+
+def compare(results: list[BenchmarkResult], baseline: dict[str, dict], threshold: float = REGRESSION_THRESHOLD) \
+        -> list[Regression]:
+    """Flags the cases whose median wall time or peak memory grew by more than `threshold` over the baseline."""
+    regressions = []
+    for result in results:
+        previous = baseline.get(result.key)
+        if previous is None:
+            continue
+        for metric in ("wall_time_median", "peak_memory"):
+            current = getattr(result, metric)
+            if current > previous[metric] * (1 + threshold):
+                regressions.append(
+                    Regression(key=result.key, metric=metric, baseline=previous[metric], current=current)
+                )
+    return regressions
+
+
+def format_results(results: list[BenchmarkResult], baseline: dict[str, dict] | None = None) -> str:
+    rows = [("case", "median ms", "min ms", "retained blocks", "peak KiB", "vs baseline")]
+    for result in results:
+        previous = (baseline or {}).get(result.key)
+        rows.append((
+            result.key,
+            f"{result.wall_time_median * 1000:.2f}",
+            f"{result.wall_time_min * 1000:.2f}",
+            str(result.retained_blocks),
+            f"{result.peak_memory / 1024:.1f}",
+            f"{result.wall_time_median / previous['wall_time_median']:.2f}x"
+            if previous and previous["wall_time_median"] else "-",
+        ))
+    widths = [max(len(row[column]) for row in rows) for column in range(len(rows[0]))]
+    return "\n".join("  ".join(cell.ljust(width) for cell, width in zip(row, widths)) for row in rows)
+
+
+def main(argv: list[str] | None = None) -> int:
+    parser = argparse.ArgumentParser(description="Benchmarks the scheduler hot paths.")
+    parser.add_argument("--output", default="benchmark_results.json", help="where to write the results as JSON")
+    parser.add_argument("--baseline", help="results of an earlier run to compare against")
+    parser.add_argument("--threshold", type=float, default=REGRESSION_THRESHOLD,
+                        help="relative slowdown or memory growth reported as a regression")
+    parser.add_argument("--repeat", type=int, default=5, help="timed runs per case")
+    parser.add_argument("--filter", default="", help="only run the cases whose key contains this text")
+    args = parser.parse_args(argv)
+
+    cases = [case for case in benchmark_cases() if args.filter in case.key]
+    cache_path = utilization_cache.path
+    with tempfile.TemporaryDirectory() as directory:
+        # Keep the benchmark's UUniFast vectors out of the experiments' cache, reconnecting on both sides
+        # so no connection outlives the directory.
+        utilization_cache.close()
+        utilization_cache.path = os.path.join(directory, "uunifast.sqlite3")
+        try:
+            results = run_benchmarks(cases, args.repeat)
+        finally:
+            utilization_cache.close()
+            utilization_cache.path = cache_path
+    save_results(args.output, results)
+
+    baseline = load_results(args.baseline) if args.baseline else None
+    print(format_results(results, baseline))
+    if baseline is None:
+        return 0
+    regressions = compare(results, baseline, args.threshold)
+    for regression in regressions:
+        print(f"REGRESSION {regression.key} {regression.metric}: "
+              f"{regression.baseline:.6g} -> {regression.current:.6g} ({regression.ratio:.2f}x)")
+    return 1 if regressions else 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -3,3 +3,21 @@ NUMBER_OF_TASKS = 12
 PERIODS = [50, 40, 30, 20, 10]
 
 ERROR_MARGIN = 0.1 ** 10
+
+UUNIFAST_CACHE_PATH = "uunifast.sqlite3"
+
+UUNIFAST_CACHE_MAX_SAMPLES = 1000
+
+UUNIFAST_CACHE_MAX_KEYS = 256
+
+TRACE_BUFFER_SIZE = 1 << 16
+
+RESULTS_PATH = "results"
+
+RESULTS_CHUNK_SIZE = 256
+
+TASK_SET_CACHE_MAX_ENTRIES = 4096
+
+FIGURES_PATH = "figures"
+
+ONLINE_HISTORY = 10_000
@@ -0,0 +1,415 @@
+import heapq
+import math
+from collections import deque
+from itertools import count
+from typing import Callable, Iterator, NamedTuple
+
+from config import ONLINE_HISTORY
+from job import Job, PeriodicJob
+from metrics import SchedulerMetrics
+from task import Task
+
+
+# Criticality modes of a processor.
+LO_MODE = "LO"
+HI_MODE = "HI"
+
+
+class ServerUtilizationException(Exception):
+    pass
+
+
+class Checkpoint(NamedTuple):
+    clock: float
+    released_until: float
+    scheduled_count: int
+    server_utilization: float
+    # Switches to HI mode since the start of the schedule.
+    mode_switches: int
+
+
+def is_high_criticality(job: Job) -> bool:
+    return job.is_periodic and job.task.high_criticality
+
+
+class EDFEngine:
+    """Runs EDF over a fixed job list using a release queue and deadline-ordered ready heaps.
+
+    Queue entries carry the job's position in the input list, so ties are broken in list order
+    exactly like the original linear scans did.
+
+    High criticality jobs and the rest (low criticality and aperiodic jobs) wait in separate ready
+    heaps. The engine starts in LO mode and switches to HI mode when an overrunning job is dispatched:
+    the low criticality heap is detached and its jobs dropped, and every low criticality or aperiodic
+    job released while in HI mode is dropped on release. At the next idle instant, when both heaps are
+    empty, it returns to LO mode. Checkpoints are only taken at idle instants, so every checkpoint is
+    in LO mode.
+    """
+
+    def __init__(
+            self,
+            jobs: list[Job],
+            server_utilization: float,
+            touch: Callable[[Job], None] | None = None,
+            on_interval: Callable[[Job, float, float], None] | None = None,
+            metrics: SchedulerMetrics | None = None,
+    ):
+        self.server_utilization: float = server_utilization
+        self.clock: float = 0
+        self.scheduled_jobs: list[Job] = []
+        self.stopped_at: Checkpoint | None = None
+        self._release_queue: list[tuple[float, int, Job]] = sorted(
+            ((job.release_time, index, job) for index, job in enumerate(jobs)), key=lambda e: (e[0], e[1])
+        )
+        # High criticality jobs, and low criticality and aperiodic jobs.
+        self._ready_queue: list[tuple[float, int, Job]] = []
+        self._low_ready_queue: list[tuple[float, int, Job]] = []
+        self._live_jobs_count: int = len(jobs)
+        self.mode: str = LO_MODE
+        self.mode_switches: int = 0
+        # Called before a job is first inspected or mutated by this run, so a caller replaying
+        # part of an existing schedule can save and reset the job's previous state.
+        self._touch = touch
+        # Called with (job, start, finish) as each execution interval closes, in schedule order.
+        self._on_interval = on_interval
+        self.metrics = metrics
+        self.checkpoints: list[Checkpoint] = [self._checkpoint(released_until=-math.inf)]
+
+    @classmethod
+    def resume(
+            cls,
+            release_queue: list[tuple[float, int, Job]],
+            checkpoint: Checkpoint,
+            touch: Callable[[Job], None] | None = None,
+            on_interval: Callable[[Job, float, float], None] | None = None,
+            metrics: SchedulerMetrics | None = None,
+    ) -> "EDFEngine":
+        engine = cls([], checkpoint.server_utilization, touch, on_interval, metrics)
+        engine.clock = checkpoint.clock
+        engine._release_queue = release_queue
+        engine._live_jobs_count = len(release_queue)
+        engine.mode_switches = checkpoint.mode_switches
+        engine.checkpoints = [checkpoint._replace(scheduled_count=0)]
+        return engine
+
+    def _checkpoint(self, released_until: float) -> Checkpoint:
+        return Checkpoint(
+            clock=self.clock,
+            released_until=released_until,
+            scheduled_count=len(self.scheduled_jobs),
+            server_utilization=self.server_utilization,
+            mode_switches=self.mode_switches,
+        )
+
+    def _pop_release_queue(self) -> tuple[float, int, Job]:
+        entry = heapq.heappop(self._release_queue)
+        if self._touch is not None:
+            self._touch(entry[2])
+        return entry
+
+    def _next_release_time(self) -> float:
+        return self._release_queue[0][0]
+
+    def _make_ready(self, entry: tuple[float, int, Job]) -> None:
+        job = entry[2]
+        if is_high_criticality(job):
+            heapq.heappush(self._ready_queue, entry)
+        elif self.mode == HI_MODE:
+            self._drop(job)
+        else:
+            heapq.heappush(self._low_ready_queue, entry)
+
+    def _ready_count(self) -> int:
+        return len(self._ready_queue) + len(self._low_ready_queue)
+
+    def _pop_ready(self) -> tuple[float, int, Job]:
+        # Entries compare by (deadline, tie-breaking key), so this is the order a single heap would give.
+        ready_queue, low_ready_queue = self._ready_queue, self._low_ready_queue
+        if not low_ready_queue or (ready_queue and ready_queue[0][:2] < low_ready_queue[0][:2]):
+            return heapq.heappop(ready_queue)
+        return heapq.heappop(low_ready_queue)
+
+    def _release_jobs(self) -> None:
+        release_queue = self._release_queue
+        while release_queue and release_queue[0][0] <= self.clock:
+            _, index, job = self._pop_release_queue()
+            self._make_ready((job.deadline, index, job))
+
+    def _pop_preempt_job(self, clock: float, deadline: float) -> tuple[float, int, Job] | None:
+        # Every job already in the ready queue has a deadline no earlier than the active job's,
+        # so only jobs released before `clock` can preempt. The first one (by release, then list
+        # order) with an earlier deadline wins; the ones passed over are released into the ready queue.
+        release_queue = self._release_queue
+        while release_queue and release_queue[0][0] <= clock:
+            _, index, job = self._pop_release_queue()
+            if job.deadline < deadline and (self.mode == LO_MODE or is_high_criticality(job)):
+                return job.deadline, index, job
+            self._make_ready((job.deadline, index, job))
+        return None
+
+    def _drop(self, job: Job) -> None:
+        if job.is_aperiodic and job.record.intervals:
+            # A started aperiodic job has taken its share of the server budget, which only completion gives back.
+            self.server_utilization += job.calculate_utilization()
+        job.drop()
+        self.scheduled_jobs.append(job)
+        self._live_jobs_count -= 1
+        if self.metrics is not None:
+            self.metrics.dropped_jobs += 1
+        if self._on_interval is not None:
+            self._on_interval(job, job.release_time, job.release_time)
+
+    def _switch_to_high_mode(self) -> None:
+        if self.mode == HI_MODE:
+            return
+        self.mode = HI_MODE
+        self.mode_switches += 1
+        if self.metrics is not None:
+            self.metrics.mode_switches += 1
+        # Only the detached heap's jobs are touched, rather than every job still waiting.
+        low_ready_queue, self._low_ready_queue = self._low_ready_queue, []
+        low_ready_queue.sort(key=lambda e: e[1])
+        for _, _, job in low_ready_queue:
+            self._drop(job)
+
+    def _switch_to_low_mode(self) -> None:
+        self.mode = LO_MODE
+
+    def run(self, stop: Callable[[Checkpoint], bool] | None = None) -> list[Job]:
+        """Schedules every job, or stops at the first idle instant accepted by `stop`."""
+        on_interval = self._on_interval
+        metrics = self.metrics
+        active_entry = None
+        while self._live_jobs_count:
+            if active_entry is None:
+                self._release_jobs()
+                if not self._ready_count():
+                    if not self._live_jobs_count:
+                        # The last jobs were dropped on release.
+                        break
+                    self._switch_to_low_mode()
+                    checkpoint = self._checkpoint(released_until=self.clock)
+                    self.checkpoints.append(checkpoint)
+                    if stop is not None and stop(checkpoint):
+                        self.stopped_at = checkpoint
+                        return self.scheduled_jobs
+                    self.clock = max(self.clock, self._next_release_time())
+                    self._release_jobs()
+                active_entry = self._pop_ready()
+                active_entry[2].record.intervals.append(self.clock)
+            active_job = active_entry[2]
+            record = active_job.record
+            if metrics is not None:
+                metrics.record_dispatch(self._ready_count())
+
+            if active_job.is_periodic:
+                active_job: PeriodicJob
+                if active_job.will_overrun:
+                    self._switch_to_high_mode()
+            elif len(record.intervals) < 2:
+                aperiodic_job_utilization = active_job.calculate_utilization()
+                if aperiodic_job_utilization < self.server_utilization:
+                    self.server_utilization -= aperiodic_job_utilization
+                else:
+                    if metrics is not None:
+                        metrics.budget_rejections += 1
+                    raise ServerUtilizationException("Server utilization exceeded!")
+
+            preempt_entry = self._pop_preempt_job(
+                clock=self.clock + record.remaining_execution_time,
+                deadline=active_job.deadline,
+            )
+            if preempt_entry is not None:
+                preempt_job = preempt_entry[2]
+                record.remaining_execution_time -= preempt_job.release_time - record.intervals[-1]
+                record.intervals.append(preempt_job.release_time)
+                if on_interval is not None:
+                    on_interval(active_job, record.intervals[-2], preempt_job.release_time)
+                preempt_job.record.intervals.append(preempt_job.release_time)
+                self.clock = preempt_job.release_time
+                self._make_ready(active_entry)
+                active_entry = preempt_entry
+                if metrics is not None:
+                    metrics.preemptions += 1
+            else:
+                self.clock += record.remaining_execution_time
+                record.intervals.append(self.clock)
+                record.remaining_execution_time = 0
+                if on_interval is not None:
+                    on_interval(active_job, record.intervals[-2], self.clock)
+                if active_job.is_aperiodic:
+                    self.server_utilization += active_job.calculate_utilization()
+                self.scheduled_jobs.append(active_job)
+                self._live_jobs_count -= 1
+                active_entry = None
+
+        self.checkpoints.append(self._checkpoint(released_until=self.clock))
+        return self.scheduled_jobs
+
+
+class OnlineEDFEngine(EDFEngine):
+    """Event-driven EDF that releases periodic jobs lazily and accepts aperiodic jobs while it runs.
+
+    Each task has exactly one job waiting in the release queue; the next instance is created when
+    that job is released. Queue entries are keyed (0, task rank, instance number) for periodic jobs
+    and (1, arrival number) for aperiodic ones, which orders ties the same way as the job list
+    EDFEngine gets from Processor.edf_schedule, so both produce the same schedule for the same jobs.
+    """
+
+    def __init__(
+            self,
+            tasks: list[Task],
+            scaling_factor: float,
+            server_utilization: float,
+            overrun: Callable[[Task, int], bool],
+            until: float = math.inf,
+            history: int | None = ONLINE_HISTORY,
+            on_interval: Callable[[Job, float, float], None] | None = None,
+            id_counter: Iterator[int] | None = None,
+            metrics: SchedulerMetrics | None = None,
+    ):
+        super().__init__([], server_utilization, on_interval=on_interval, metrics=metrics)
+        self.tasks = tasks
+        self.scaling_factor = scaling_factor
+        self.until = until
+        # Only the last `history` finished or dropped jobs are kept, so memory stays bounded over long runs;
+        # history=None keeps every job.
+        self.scheduled_jobs: deque[Job] = deque(maxlen=history)
+        self._overrun = overrun
+        self._id_counter = id_counter
+        self._arrival_counter = count()
+        self._active_entry: tuple[float, tuple, Job] | None = None
+        self._dispatched = False
+        # Every job released at or before this time has been taken out of the release queue.
+        self._released_through: float = -math.inf
+        for rank, task in enumerate(tasks):
+            self._push_periodic_job(rank, task, instance_number=1, release_time=0)
+
+    def _push_periodic_job(self, rank: int, task: Task, instance_number: int, release_time: int) -> None:
+        if release_time >= self.until:
+            return
+        if task.high_criticality:
+            deadline = release_time + task.period * self.scaling_factor
+            will_overrun = self._overrun(task, instance_number)
+        else:
+            deadline = release_time + task.period
+            will_overrun = False
+        job = PeriodicJob(task, release_time, deadline, instance_number, will_overrun, id_counter=self._id_counter)
+        heapq.heappush(self._release_queue, (release_time, (0, rank, instance_number), job))
+
+    def _pop_release_queue(self) -> tuple[float, tuple, Job]:
+        entry = heapq.heappop(self._release_queue)
+        job = entry[2]
+        if job.is_periodic:
+            self._push_periodic_job(
+                entry[1][1], job.task, job.instance_number + 1, job.release_time + job.task.period
+            )
+        return entry
+
+    def _next_release_time(self) -> float:
+        return self._release_queue[0][0] if self._release_queue else math.inf
+
+    def _release_jobs(self) -> None:
+        super()._release_jobs()
+        self._released_through = max(self._released_through, self.clock)
+
+    def _pop_preempt_job(self, clock: float, deadline: float) -> tuple[float, tuple, Job] | None:
+        entry = super()._pop_preempt_job(clock, deadline)
+        self._released_through = max(self._released_through, entry[2].release_time if entry is not None else clock)
+        return entry
+
+    def submit(self, job: Job) -> None:
+        """Adds an aperiodic job. It has to arrive before the simulation reaches its release time."""
+        if job.release_time <= self._released_through:
+            raise ValueError(f"job {job.id} is released at {job.release_time}, which was already simulated")
+        heapq.heappush(self._release_queue, (job.release_time, (1, next(self._arrival_counter)), job))
+
+    def step(self) -> bool:
+        """Runs until the next execution interval closes. Returns False if no job is left to run."""
+        return self._advance(math.inf, max_intervals=1) > 0
+
+    def run_until(self, time: float) -> list[Job]:
+        """Simulates everything that happens before `time`, so jobs released at `time` can still be submitted.
+
+        A job still running at `time` is continued by the next call.
+        """
+        self._advance(time)
+        return list(self.scheduled_jobs)
+
+    def _advance(self, time: float, max_intervals: float = math.inf) -> int:
+        on_interval = self._on_interval
+        metrics = self.metrics
+        active_entry = self._active_entry
+        # Releases and preemptions are only simulated strictly before `time`.
+        last_release_time = math.nextafter(time, -math.inf)
+        intervals = 0
+        while intervals < max_intervals:
+            if active_entry is None:
+                if self.clock >= time:
+                    break
+                self._release_jobs()
+                if not self._ready_count():
+                    self._switch_to_low_mode()
+                    next_release_time = self._next_release_time()
+                    if next_release_time >= time:
+                        break
+                    self.clock = max(self.clock, next_release_time)
+                    self._release_jobs()
+                active_entry = self._pop_ready()
+                active_entry[2].record.intervals.append(self.clock)
+                self._dispatched = False
+            active_job = active_entry[2]
+            record = active_job.record
+
+            if not self._dispatched:
+                # A job continued from a previous call was already checked when it was dispatched.
+                self._dispatched = True
+                if metrics is not None:
+                    metrics.record_dispatch(self._ready_count())
+                if active_job.is_periodic:
+                    active_job: PeriodicJob
+                    if active_job.will_overrun:
+                        self._switch_to_high_mode()
+                elif len(record.intervals) < 2:
+                    aperiodic_job_utilization = active_job.calculate_utilization()
+                    if aperiodic_job_utilization < self.server_utilization:
+                        self.server_utilization -= aperiodic_job_utilization
+                    else:
+                        if metrics is not None:
+                            metrics.budget_rejections += 1
+                        raise ServerUtilizationException("Server utilization exceeded!")
+
+            finish_time = self.clock + record.remaining_execution_time
+            preempt_entry = self._pop_preempt_job(
+                clock=finish_time if finish_time < time else last_release_time,
+                deadline=active_job.deadline,
+            )
+            if preempt_entry is not None:
+                preempt_job = preempt_entry[2]
+                record.remaining_execution_time -= preempt_job.release_time - record.intervals[-1]
+                record.intervals.append(preempt_job.release_time)
+                if on_interval is not None:
+                    on_interval(active_job, record.intervals[-2], preempt_job.release_time)
+                preempt_job.record.intervals.append(preempt_job.release_time)
+                self.clock = preempt_job.release_time
+                self._make_ready(active_entry)
+                active_entry = preempt_entry
+                if metrics is not None:
+                    metrics.preemptions += 1
+                self._dispatched = False
+            elif finish_time < time:
+                self.clock += record.remaining_execution_time
+                record.intervals.append(self.clock)
+                record.remaining_execution_time = 0
+                if on_interval is not None:
+                    on_interval(active_job, record.intervals[-2], self.clock)
+                if active_job.is_aperiodic:
+                    self.server_utilization += active_job.calculate_utilization()
+                self.scheduled_jobs.append(active_job)
+                active_entry = None
+            else:
+                break
+            intervals += 1
+
+        self._active_entry = active_entry
+        return intervals
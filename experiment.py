@@ -0,0 +1,356 @@
+import cProfile
+import math
+import os
+import statistics
+import time
+from concurrent.futures import ProcessPoolExecutor
+from contextlib import nullcontext
+from typing import NamedTuple
+
+from analytics import ScheduleAnalytics
+from main import schedule, AllocationException
+from metrics import SchedulerMetrics
+from results import ResultStore, TrialRecord, params_key
+from simulation import derive_seed
+
+CONFIDENCE_LEVEL = 0.95
+ADAPTIVE_MIN_TRIALS = 20
+ADAPTIVE_MAX_TRIALS = 1000
+ADAPTIVE_BATCH_SIZE = 20
+
+
+class TrialResult(NamedTuple):
+    point: int
+    seed: int
+    quality_of_service: float | None
+    schedulable: bool
+    error: str | None
+    simulated: bool | None = None
+    metrics: SchedulerMetrics | None = None
+    runtime: float = 0.0
+    # Set when the trial's params ask schedule for analytics.
+    analytics: ScheduleAnalytics | None = None
+    # Whether the allocation heuristic placed every task; None when the trial errored.
+    allocated: bool | None = None
+
+
+class PointSummary(NamedTuple):
+    params: dict
+    trials: int
+    schedulable_count: int
+    schedulable_ratio: float
+    # Wilson score interval (lower, upper) of the ratio.
+    schedulable_interval: tuple[float, float]
+    quality_of_service_mean: float
+    quality_of_service_ci: float
+    errors: list[str]
+    cross_checked: int = 0
+    # Accepted by the EDF-VD test but missed a deadline when simulated.
+    cross_check_violations: int = 0
+    metrics: SchedulerMetrics | None = None
+    # Allocated but rejected by the EDF-VD test, yet met every deadline when simulated.
+    cross_check_pessimistic: int = 0
+    allocated_ratio: float = math.nan
+    allocated_interval: tuple[float, float] = (math.nan, math.nan)
+
+
+def trial_seed(root_seed: int, point: int, trial: int) -> int:
+    return derive_seed(root_seed, point, trial)
+
+
+def run_trial(
+        params: dict,
+        point: int,
+        seed: int,
+        cross_check: bool = False,
+        collect_metrics: bool = False,
+        profile_dir: str | None = None,
+) -> TrialResult:
+    """Runs one `schedule` trial, optionally collecting its metrics and dumping its cProfile stats to
+    `profile_dir`/trial-<point>-<seed>.prof."""
+    metrics = SchedulerMetrics() if collect_metrics else None
+    params = {**params, "seed": seed, "metrics": metrics}
+    if cross_check:
+        params["cross_check"] = True
+    started = time.perf_counter()
+    if profile_dir is None:
+        result = trial_outcome(params, point, seed)
+    else:
+        profiler = cProfile.Profile()
+        profiler.enable()
+        try:
+            result = trial_outcome(params, point, seed)
+        finally:
+            profiler.disable()
+            profiler.dump_stats(os.path.join(profile_dir, f"trial-{point}-{seed}.prof"))
+    return result._replace(metrics=metrics, runtime=time.perf_counter() - started)
+
+
+def trial_outcome(params: dict, point: int, seed: int) -> TrialResult:
+    try:
+        result = schedule(**params)
+    except AllocationException:
+        return TrialResult(point=point, seed=seed, quality_of_service=None, schedulable=False, error=None,
+                           allocated=False)
+    except Exception as e:
+        # Nothing is known about an errored trial's schedulability; summarize leaves it out of the ratio.
+        return TrialResult(point=point, seed=seed, quality_of_service=None, schedulable=False, error=repr(e))
+    return TrialResult(point=point, seed=seed, quality_of_service=result.quality_of_service,
+                       schedulable=result.schedulable, error=None, analytics=result.analytics,
+                       simulated=result.simulated, allocated=result.allocated)
+
+
+def trial_record(params: dict, result: TrialResult) -> TrialRecord:
+    return TrialRecord(
+        params=params,
+        seed=result.seed,
+        quality_of_service=result.quality_of_service,
+        schedulable=result.schedulable,
+        simulated=result.simulated,
+        # schedule() sets this from the final schedule, not from the engines' running count. Schedulability-only
+        # trials simulate nothing to drop jobs from.
+        dropped_jobs=(
+            result.metrics.dropped_jobs
+            if result.metrics is not None and result.quality_of_service is not None else None
+        ),
+        runtime=result.runtime,
+        error=result.error,
+        allocated=result.allocated,
+    )
+
+
+def stored_trial_result(point: int, record: TrialRecord) -> TrialResult:
+    return TrialResult(
+        point=point,
+        seed=record.seed,
+        quality_of_service=record.quality_of_service,
+        schedulable=record.schedulable,
+        error=record.error,
+        simulated=record.simulated,
+        runtime=record.runtime,
+        allocated=record.allocated,
+    )
+
+
+def confidence_interval(values: list[float]) -> tuple[float, float]:
+    if not values:
+        return math.nan, math.nan
+    mean = statistics.fmean(values)
+    if len(values) < 2:
+        return mean, math.inf
+    z = statistics.NormalDist().inv_cdf(0.5 + CONFIDENCE_LEVEL / 2)
+    return mean, z * statistics.stdev(values) / math.sqrt(len(values))
+
+
+def proportion_interval(outcomes: list[bool]) -> tuple[float, tuple[float, float]]:
+    """Observed ratio and its Wilson score interval as (lower, upper).
+
+    Unlike the normal approximation, the interval does not collapse to width 0 when every outcome is the same,
+    and it stays within [0, 1]. Its centre lies between the observed ratio and 1/2, so the interval is not
+    symmetric around the ratio.
+    """
+    n = len(outcomes)
+    if not n:
+        return math.nan, (math.nan, math.nan)
+    ratio = sum(outcomes) / n
+    z = statistics.NormalDist().inv_cdf(0.5 + CONFIDENCE_LEVEL / 2)
+    centre = (ratio + z * z / (2 * n)) / (1 + z * z / n)
+    half_width = z / (1 + z * z / n) * math.sqrt(ratio * (1 - ratio) / n + z * z / (4 * n * n))
+    return ratio, (max(0.0, centre - half_width), min(1.0, centre + half_width))
+
+
+def half_width(interval: tuple[float, float]) -> float:
+    lower, upper = interval
+    return (upper - lower) / 2
+
+
+def summarize(params: dict, results: list[TrialResult]) -> PointSummary:
+    decided = [r for r in results if r.error is None]
+    schedulable_ratio, schedulable_interval = proportion_interval([r.schedulable for r in decided])
+    allocated_ratio, allocated_interval = proportion_interval(
+        [r.allocated for r in decided if r.allocated is not None]
+    )
+    qos_mean, qos_ci = confidence_interval(
+        [r.quality_of_service for r in results if r.quality_of_service is not None]
+    )
+    cross_checked = [r for r in results if r.simulated is not None]
+    metrics = None
+    for result in results:
+        if result.metrics is not None:
+            metrics = (metrics or SchedulerMetrics()).merge(result.metrics)
+    return PointSummary(
+        params=params,
+        trials=len(results),
+        schedulable_count=sum(r.schedulable for r in decided),
+        schedulable_ratio=schedulable_ratio,
+        schedulable_interval=schedulable_interval,
+        quality_of_service_mean=qos_mean,
+        quality_of_service_ci=qos_ci,
+        errors=[r.error for r in results if r.error is not None],
+        cross_checked=len(cross_checked),
+        # The analytical test is only sufficient: an accepted task set missing a deadline is a violation, and
+        # a rejected one meeting every deadline shows how pessimistic the test is.
+        cross_check_violations=sum(r.schedulable and not r.simulated for r in cross_checked),
+        metrics=metrics,
+        cross_check_pessimistic=sum(not r.schedulable and r.simulated for r in cross_checked),
+        allocated_ratio=allocated_ratio,
+        allocated_interval=allocated_interval,
+    )
+
+
+def adaptive_ci(summary: PointSummary) -> float:
+    """Width that adaptive sampling drives down; NaN (nothing to estimate, e.g. no schedulable trial) counts as 0."""
+    if summary.params.get("schedulability_only"):
+        # Both ratios are reported, so both have to be narrow.
+        width = max(half_width(summary.schedulable_interval), half_width(summary.allocated_interval))
+    else:
+        width = summary.quality_of_service_ci
+    return 0 if math.isnan(width) else width
+
+
+class ExperimentRunner:
+    """Runs independent `schedule` trials for every parameter point on a process pool.
+
+    With `cross_check_every` set, every n-th `schedulability_only` trial is also simulated so the
+    analytical verdict can be compared against the EDF run. With `collect_metrics` each summary carries
+    the scheduler metrics of its trials, and with `profile_dir` every trial is profiled into that directory.
+
+    With a `store`, every finished trial is appended to it as it completes, and trials whose parameters
+    and seed are already stored are read back instead of run again, so an interrupted sweep resumes where
+    it stopped. Stored trials carry no metrics beyond their dropped job count.
+    """
+
+    def __init__(
+            self,
+            max_workers: int | None = None,
+            root_seed: int = 0,
+            cross_check_every: int = 0,
+            collect_metrics: bool = False,
+            profile_dir: str | None = None,
+            store: ResultStore | None = None,
+    ):
+        self.max_workers = max_workers or os.cpu_count() or 1
+        self.root_seed = root_seed
+        self.cross_check_every = cross_check_every
+        self.collect_metrics = collect_metrics
+        self.profile_dir = profile_dir
+        self.store = store
+        if profile_dir is not None:
+            os.makedirs(profile_dir, exist_ok=True)
+
+    def should_cross_check(self, params: dict, trial: int) -> bool:
+        return bool(params.get("schedulability_only")) and self.cross_check_every > 0 \
+            and trial % self.cross_check_every == 0
+
+    def run_trials(self, points: list[dict], trials: int) -> list[list[TrialResult]]:
+        return self.run_trial_ranges(points, [range(trials)] * len(points))
+
+    def run_trial_ranges(
+            self, points: list[dict], trial_ranges: list[range], executor: ProcessPoolExecutor | None = None
+    ) -> list[list[TrialResult]]:
+        """Runs trials `trial_ranges[i]` of point i, on `executor` if given and otherwise on a new pool."""
+        store = self.store
+        completed = store.completed() if store is not None else {}
+        # The dropped job count of a stored trial comes from its metrics.
+        collect_metrics = self.collect_metrics or store is not None
+        results: list[list[TrialResult]] = [[] for _ in points]
+        tasks = []
+        for point, (params, trial_range) in enumerate(zip(points, trial_ranges)):
+            key = params_key(params)
+            for trial in trial_range:
+                seed = trial_seed(self.root_seed, point, trial)
+                record = completed.get((key, seed))
+                if record is not None:
+                    results[point].append(stored_trial_result(point, record))
+                else:
+                    tasks.append((params, point, seed, self.should_cross_check(params, trial), collect_metrics,
+                                  self.profile_dir))
+
+        def collect(result: TrialResult) -> None:
+            results[result.point].append(result)
+            if store is not None:
+                store.append(trial_record(points[result.point], result))
+
+        try:
+            if self.max_workers == 1 or len(tasks) <= 1:
+                for task in tasks:
+                    collect(run_trial(*task))
+            else:
+                chunksize = max(1, len(tasks) // (self.max_workers * 4))
+                with (ProcessPoolExecutor(max_workers=self.max_workers) if executor is None
+                      else nullcontext(executor)) as pool:
+                    for result in pool.map(run_trial, *zip(*tasks), chunksize=chunksize):
+                        collect(result)
+        finally:
+            if store is not None:
+                store.flush()
+        return results
+
+    def run(self, points: list[dict], trials: int) -> list[PointSummary]:
+        return [summarize(params, results) for params, results in zip(points, self.run_trials(points, trials))]
+
+    def run_adaptive(
+            self,
+            points: list[dict],
+            target_ci: float,
+            min_trials: int = ADAPTIVE_MIN_TRIALS,
+            max_trials: int = ADAPTIVE_MAX_TRIALS,
+            batch_size: int = ADAPTIVE_BATCH_SIZE,
+            budget: int | None = None,
+    ) -> list[PointSummary]:
+        """Runs trials in batches until every point's confidence interval is at most `target_ci`.
+
+        The interval is the wider of the schedulable and allocated ratios' for `schedulability_only` points and the
+        quality of service's
+        otherwise. A point stops at `max_trials`, and the sweep stops once `budget` trials ran in total; while
+        the budget lasts, the points with the widest intervals get the next batches first.
+        """
+        results: list[list[TrialResult]] = [[] for _ in points]
+        trial_counts = [0] * len(points)
+        # (point, trials) to run next, widest interval first.
+        batches = [(point, min_trials) for point in range(len(points))]
+        remaining_budget = math.inf if budget is None else budget
+        pool = ProcessPoolExecutor(max_workers=self.max_workers) if self.max_workers > 1 else None
+        with pool if pool is not None else nullcontext():
+            while batches and remaining_budget > 0:
+                trial_ranges = [range(0)] * len(points)
+                for point, trials in batches:
+                    trials = int(min(trials, remaining_budget))
+                    remaining_budget -= trials
+                    trial_ranges[point] = range(trial_counts[point], trial_counts[point] + trials)
+                    trial_counts[point] += trials
+                for point, point_results in enumerate(self.run_trial_ranges(points, trial_ranges, pool)):
+                    results[point] += point_results
+
+                widths = [
+                    adaptive_ci(summarize(params, point_results)) for params, point_results in zip(points, results)
+                ]
+                uncertain = sorted(
+                    (point for point, width in enumerate(widths)
+                     if width > target_ci and trial_counts[point] < max_trials),
+                    key=lambda point: widths[point], reverse=True,
+                )
+                batches = [(point, min(batch_size, max_trials - trial_counts[point])) for point in uncertain]
+        return [summarize(params, point_results) for params, point_results in zip(points, results)]
+
+
+def format_ratio(ratio: float, interval: tuple[float, float]) -> str:
+    return f"{ratio:.3f} [{interval[0]:.3f}, {interval[1]:.3f}]"
+
+
+def format_table(summaries: list[PointSummary]) -> str:
+    rows = [("params", "trials", "allocated", "schedulable", "qos", "errors", "cross-check")]
+    for summary in summaries:
+        rows.append((
+            " ".join(f"{key}={value}" for key, value in summary.params.items()),
+            str(summary.trials),
+            format_ratio(summary.allocated_ratio, summary.allocated_interval),
+            format_ratio(summary.schedulable_ratio, summary.schedulable_interval),
+            f"{summary.quality_of_service_mean:.2f} ± {summary.quality_of_service_ci:.2f}",
+            str(len(summary.errors)),
+            f"{summary.cross_check_violations}/{summary.cross_checked} accepted but missed, "
+            f"{summary.cross_check_pessimistic}/{summary.cross_checked} rejected but met" if summary.cross_checked
+            else "-",
+        ))
+    widths = [max(len(row[column]) for row in rows) for column in range(len(rows[0]))]
+    return "\n".join("  ".join(cell.ljust(width) for cell, width in zip(row, widths)) for row in rows)
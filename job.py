@@ -1,49 +1,96 @@
 from itertools import count, zip_longest
+from typing import Iterator, Sequence
 
 from task import Task
 
 
+class ExecutionRecord:
+    __slots__ = ("remaining_execution_time", "dropped", "intervals")
+
+    def __init__(self, execution_time: float):
+        self.remaining_execution_time: float = execution_time
+        self.dropped: bool = False
+        # Start and finish times interleaved: [start_1, finish_1, start_2, finish_2, ...].
+        self.intervals: list[float] = []
+
+    @property
+    def start_time_list(self) -> list[float]:
+        return self.intervals[0::2]
+
+    @property
+    def finish_time_list(self) -> list[float]:
+        return self.intervals[1::2]
+
+
 class Job:
-    id_counter = count(start=1)
+    __slots__ = ("id", "release_time", "deadline", "execution_time", "record")
 
-    def __init__(self, release_time: float, deadline: float, execution_time: float):
-        self.id: int = next(self.id_counter)
+    id_counter = count(start=1)
+    is_periodic = False
+    is_aperiodic = True
+
+    def __init__(
+            self,
+            release_time: float,
+            deadline: float,
+            execution_time: float,
+            id_counter: Iterator[int] | None = None,
+    ):
+        self.id: int = next(id_counter or self.id_counter)
         self.release_time: float = release_time
         self.deadline: float = deadline
         self.execution_time: float = execution_time
-        self.remaining_execution_time: float = execution_time
-        self.dropped: bool = False
-        self.start_time_list: list[float] = []
-        self.finish_time_list: list[float] = []
+        self.record: ExecutionRecord = ExecutionRecord(execution_time)
 
     @property
-    def start_time(self):
-        return self.start_time_list[0] if self.start_time_list else None
+    def remaining_execution_time(self) -> float:
+        return self.record.remaining_execution_time
+
+    @remaining_execution_time.setter
+    def remaining_execution_time(self, value: float):
+        self.record.remaining_execution_time = value
 
     @property
-    def finish_time(self):
-        return self.finish_time_list[-1] if self.finish_time_list else None
+    def dropped(self) -> bool:
+        return self.record.dropped
 
     @property
-    def execution_intervals(self):
-        return list(zip_longest(self.start_time_list, self.finish_time_list, fillvalue=None))
+    def start_time_list(self) -> list[float]:
+        return self.record.start_time_list
+
+    @property
+    def finish_time_list(self) -> list[float]:
+        return self.record.finish_time_list
+
+    @property
+    def start_time(self):
+        intervals = self.record.intervals
+        return intervals[0] if intervals else None
 
     @property
-    def is_periodic(self):
-        return isinstance(self, PeriodicJob)
+    def finish_time(self):
+        intervals = self.record.intervals
+        if len(intervals) < 2:
+            return None
+        return intervals[-1] if len(intervals) % 2 == 0 else intervals[-2]
 
     @property
-    def is_aperiodic(self):
-        return not isinstance(self, PeriodicJob)
+    def execution_intervals(self):
+        return list(zip_longest(self.start_time_list, self.finish_time_list, fillvalue=None))
 
     def calculate_utilization(self) -> float:
         return self.execution_time / (self.deadline - self.release_time)
 
+    def reset(self) -> ExecutionRecord:
+        record = self.record
+        self.record = ExecutionRecord(self.execution_time)
+        return record
+
     def drop(self):
-        self.start_time_list.append(self.release_time)
-        self.finish_time_list.append(self.release_time)
-        self.remaining_execution_time = 0
-        self.dropped = True
+        record = self.record
+        record.intervals += (self.release_time, self.release_time)
+        record.remaining_execution_time = 0
+        record.dropped = True
 
     def __eq__(self, value: "Job") -> bool:
         return self.id == value.id
@@ -59,13 +106,57 @@ class Job:
 
 
 class PeriodicJob(Job):
-    def __init__(self, task: Task, release_time: float, deadline: float, instance_number: int, will_overrun: bool):
+    __slots__ = ("task", "instance_number", "will_overrun")
+
+    is_periodic = True
+    is_aperiodic = False
+
+    def __init__(
+            self,
+            task: Task,
+            release_time: float,
+            deadline: float,
+            instance_number: int,
+            will_overrun: bool,
+            id_counter: Iterator[int] | None = None,
+    ):
         execution_time = task.execution_time * 2 if will_overrun else task.execution_time
-        super().__init__(release_time=release_time, deadline=deadline, execution_time=execution_time)
+        super().__init__(
+            release_time=release_time, deadline=deadline, execution_time=execution_time, id_counter=id_counter
+        )
         self.task: Task = task
         self.instance_number = instance_number
         self.will_overrun = will_overrun
 
+    @classmethod
+    def from_releases(
+            cls,
+            task: Task,
+            release_times: Sequence[float],
+            deadlines: Sequence[float],
+            overruns: Sequence[bool],
+            id_counter: Iterator[int] | None = None,
+    ) -> list["PeriodicJob"]:
+        # Same result as calling the constructor per instance, without the per-job call chain.
+        jobs = []
+        new_job = object.__new__
+        id_counter = id_counter or cls.id_counter
+        execution_time = task.execution_time
+        for instance_number, (release_time, deadline, will_overrun) in enumerate(
+                zip(release_times, deadlines, overruns), start=1
+        ):
+            job = new_job(cls)
+            job.id = next(id_counter)
+            job.release_time = release_time
+            job.deadline = deadline
+            job.execution_time = execution_time * 2 if will_overrun else execution_time
+            job.record = ExecutionRecord(job.execution_time)
+            job.task = task
+            job.instance_number = instance_number
+            job.will_overrun = will_overrun
+            jobs.append(job)
+        return jobs
+
     def __str__(self) -> str:
         return (
                 f"JOB{'[OVERRUNS]' if self.will_overrun else ''}=> id={self.id}: task=({str(self.task)})\n"
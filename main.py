@@ -1,155 +1,250 @@
-import copy
 import random
+from contextlib import contextmanager
+from typing import Iterator, NamedTuple
 
-import math
 
-from config import *
-from job import Job, PeriodicJob
+from allocation import AllocationException, BEST_FIT, allocate
+from analytics import JobColumns, ScheduleAnalytics, analyze, quality_of_service
+from config import ERROR_MARGIN, NUMBER_OF_TASKS, PERIODS
+from job import Job
+from metrics import SchedulerMetrics
+from multicore import PARTITIONED, MulticoreEngine
 from processor import Processor
+from simulation import SimulationContext
+from taskset import task_set_cache
 from task import Task
-from utils import decide_task_criticality, get_periods, read_json_to_dict, write_dict_to_json
-
-
-def uunifast(tasks_count: int, utilization, iterations=100_000):
-    iteration = 0
-    tasks = []
-    while iteration < iterations:
-        utilization_sum = utilization
-        for _ in range(tasks_count - 1):
-            next_utilization_sum = utilization_sum * math.pow(random.uniform(0, 1), 1 / (tasks_count - 1))
-            tasks.append(utilization_sum - next_utilization_sum)
-            utilization_sum = next_utilization_sum
-        tasks.append(utilization_sum)
-        if all(util <= 1 for util in tasks):
-            break
-        else:
-            tasks = []
-        iteration += 1
-    uunifast_cache = read_json_to_dict('uunifast.json')
-    tasks_list = uunifast_cache.get(f'{tasks_count}${utilization}', [])
-    if tasks:
-        tasks_list.append(tasks)
-        uunifast_cache[f'{tasks_count}${utilization}'] = tasks_list
-        write_dict_to_json(uunifast_cache, f'uunifast.json')
-    else:
-        if len(tasks_list) > 0:
-            tasks = random.choice(tasks_list)
-        else:
-            return uunifast(tasks_count, utilization, iterations=10 * iterations)
-    return tasks
+from utilization import UUNIFAST_DISCARD, sample_utilizations
+from utilization_cache import utilization_cache
+from tracing import Trace, TraceSink, Verbosity
+from utils import decide_task_criticality, get_periods
+
+
+class UUniFastException(Exception):
+    pass
+
 
+def uunifast(tasks_count: int, utilization, iterations=100_000, max_attempts=3, method=UUNIFAST_DISCARD,
+             rng: random.Random = random):
+    for _ in range(max_attempts):
+        vectors = sample_utilizations(tasks_count, utilization, 1, rng, method, max_candidates=iterations)
+        if vectors:
+            utilization_cache.add(tasks_count, utilization, vectors[0])
+            return vectors[0]
+        cached_tasks = utilization_cache.samples(tasks_count, utilization)
+        if cached_tasks:
+            return rng.choice(cached_tasks)
+        iterations *= 10
+    raise UUniFastException(f"no valid utilizations for {tasks_count} tasks with total utilization {utilization}")
 
-def create_tasks(task_utils, task_periods):
+
+def create_tasks(task_utils, task_periods, rng: random.Random = random, id_counter: Iterator[int] | None = None):
     tasks: list[Task] = []
 
     for util, period in zip(task_utils, task_periods):
         execution_time = util * period
-        high_criticality = decide_task_criticality()
-        new_task = Task(period=period, util=util, execution_time=execution_time, high_criticality=high_criticality)
+        high_criticality = decide_task_criticality(rng)
+        new_task = Task(period=period, util=util, execution_time=execution_time, high_criticality=high_criticality,
+                        id_counter=id_counter)
         tasks.append(new_task)
 
     tasks = sorted(tasks, key=lambda task: task.util, reverse=True)
     return tasks
 
 
-class AllocationException(Exception):
-    pass
-
-
-def allocate_processors_to_tasks(tasks: list[Task], processors: list[Processor]):
-    tasks = sorted(tasks, key=lambda t: t.util, reverse=True)
-    for task in tasks:
-
-        min_util = math.inf
-        min_processor = None
-
-        for processor in processors:
-            if processor.get_remaining_util() >= task.util and processor.get_remaining_util() - task.util < min_util:
-                min_util = processor.get_remaining_util() - task.util
-                min_processor = processor
-
-        if min_processor is None:
-            print("--- Assign task to processor is not possible! ---")
-            raise AllocationException("\nscheduling was not possible!")
-        else:
-            min_processor.assign_task(task)
+def allocate_processors_to_tasks(tasks: list[Task], processors: list[Processor], heuristic: str = BEST_FIT):
+    if not allocate(tasks=tasks, processors=processors, heuristic=heuristic).allocated:
+        raise AllocationException("\nscheduling was not possible!")
 
 
-def get_aperiodic_release_times(count: int, hyper_period: int):
+def get_aperiodic_release_times(count: int, hyper_period: int, rng: random.Random = random):
     release_times = []
     for _ in range(count):
-        release_times.append(random.randint(0, hyper_period))
+        release_times.append(rng.randint(0, hyper_period))
     return release_times
 
 
-def create_aperiodic_jobs(count: int, hyper_period: int):
-    job_deadlines = get_periods(n=count, periods_list=PERIODS)
-    job_release_times = get_aperiodic_release_times(count=count, hyper_period=hyper_period)
+def create_aperiodic_jobs(count: int, hyper_period: int, rng: random.Random = random,
+                          id_counter: Iterator[int] | None = None, periods: list[int] = PERIODS):
+    job_deadlines = get_periods(n=count, periods_list=periods, rng=rng)
+    job_release_times = get_aperiodic_release_times(count=count, hyper_period=hyper_period, rng=rng)
 
     jobs = []
     for deadline, release_time in zip(job_deadlines, job_release_times):
         absolute_deadline = release_time + deadline
         execution_time = deadline // 2
-        jobs.append(Job(release_time=release_time, deadline=absolute_deadline, execution_time=execution_time))
+        jobs.append(Job(release_time=release_time, deadline=absolute_deadline, execution_time=execution_time,
+                        id_counter=id_counter))
 
     return jobs
 
 
 def calculate_quality_of_service(jobs: list[Job]):
-    low_priority_jobs = list(
-        filter(lambda j: not isinstance(j, PeriodicJob) or not j.task.high_criticality, jobs))
-    sum_QOS = 0
-    if len(low_priority_jobs) == 0:
-        return sum_QOS
-    for job in low_priority_jobs:
-        if len(job.finish_time_list) == 0 or job.dropped:
+    return quality_of_service(jobs)
+
+
+class ScheduleResult(NamedTuple):
+    """What one schedule() call found; fields the call did not produce are None."""
+    # Quality of service of the simulated schedule; None when only schedulability was checked.
+    quality_of_service: float | None = None
+    # Passed the EDF-VD test on every processor. Simulations report True, as they only run once every task
+    # was allocated.
+    schedulable: bool = True
+    # Met every deadline when simulated; only set when cross-checked.
+    simulated: bool | None = None
+    # The allocation heuristic placed every task.
+    allocated: bool = True
+    # Only set when analytics are asked for.
+    analytics: ScheduleAnalytics | None = None
+    # Global EDF and semi-partitioned modes only, by processor id: the share of the simulated time each core
+    # was busy, and the quality of service of the jobs it finished and of its processor's dropped jobs.
+    core_utilizations: dict[int, float] | None = None
+    core_quality_of_service: dict[int, float] | None = None
+
+
+def has_deadline_miss(jobs: list[Job]) -> bool:
+    for job in jobs:
+        if job.dropped:
             continue
-        if job.finish_time_list[-1] <= job.deadline and job.remaining_execution_time > 0:
-            print("me")
-        if job.finish_time_list[-1] <= job.deadline:
-            sum_QOS += 100
-        else:
-            sum_QOS += max(0, 100 - 10 * (job.finish_time_list[-1] - job.deadline))
-
-    return sum_QOS / len(low_priority_jobs)
-
+        deadline = job.release_time + job.task.period if job.is_periodic else job.deadline
+        if job.finish_time is None or job.finish_time > deadline + ERROR_MARGIN:
+            return True
+    return False
 
-def schedule(overrun_probability, sum_util, number_of_aperiodic_jobs, number_of_processors, should_print=False):
-    task_utils = uunifast(tasks_count=NUMBER_OF_TASKS, utilization=sum_util)
-    task_periods = get_periods(n=NUMBER_OF_TASKS, periods_list=PERIODS)
 
-    tasks = create_tasks(task_utils=task_utils, task_periods=task_periods)
-    hyper_period = math.lcm(*[task.period for task in tasks])
+def check_schedulability(processors: list[Processor], hyper_period: int, cross_check: bool) -> ScheduleResult:
+    schedulable = all(processor.is_edf_vd_schedulable() for processor in processors)
+    if not cross_check:
+        return ScheduleResult(schedulable=schedulable)
 
-    processors = [Processor(overrun_probability) for _ in range(number_of_processors)]
-    allocate_processors_to_tasks(tasks=tasks, processors=processors)
+    simulated = True
+    for processor in processors:
+        processor.calculate_server_utilization()
+        if has_deadline_miss(processor.edf_schedule(until=hyper_period)):
+            simulated = False
+    return ScheduleResult(schedulable=schedulable, simulated=simulated)
 
-    aperiodic_jobs = create_aperiodic_jobs(count=number_of_aperiodic_jobs, hyper_period=hyper_period)
 
-    all_jobs = []
+@contextmanager
+def collect_metrics(processors: list[Processor], metrics: SchedulerMetrics | None):
+    """Gives each processor its own metrics while the block runs, then adds them all to `metrics`."""
+    if metrics is None:
+        yield
+        return
+    for processor in processors:
+        processor.metrics = SchedulerMetrics()
+    try:
+        yield
+    finally:
+        for processor in processors:
+            metrics.merge(processor.metrics)
+
+
+def schedule(overrun_probability, sum_util, number_of_aperiodic_jobs, number_of_processors,
+             verbosity=Verbosity.QUIET, schedulability_only=False, cross_check=False, allocation_heuristic=BEST_FIT,
+             trace_sink: TraceSink | None = None, mode=PARTITIONED, seed: int | None = None,
+             metrics: SchedulerMetrics | None = None, analytics=False, number_of_tasks=NUMBER_OF_TASKS,
+             periods: list[int] = PERIODS) -> ScheduleResult:
+    context = SimulationContext(seed)
+    task_utils = uunifast(tasks_count=number_of_tasks, utilization=sum_util, rng=context.rng("utilizations"))
+    task_periods = get_periods(n=number_of_tasks, periods_list=periods, rng=context.rng("periods"))
+
+    tasks = create_tasks(task_utils=task_utils, task_periods=task_periods, rng=context.rng("criticality"),
+                         id_counter=context.task_ids)
+    hyper_period = task_set_cache.hyper_period(task.period for task in tasks)
+
+    processors = [
+        Processor(overrun_probability, rng=context.rng("overruns", index), id_counter=context.processor_ids,
+                  job_ids=context.job_ids)
+        for index in range(number_of_processors)
+    ]
+    with collect_metrics(processors, metrics):
+        if schedulability_only:
+            if not allocate(tasks=tasks, processors=processors, heuristic=allocation_heuristic).allocated:
+                return ScheduleResult(schedulable=False, simulated=False if cross_check else None, allocated=False)
+            return check_schedulability(processors, hyper_period, cross_check)
+        allocate_processors_to_tasks(tasks=tasks, processors=processors, heuristic=allocation_heuristic)
+
+        aperiodic_jobs = create_aperiodic_jobs(count=number_of_aperiodic_jobs, hyper_period=hyper_period,
+                                               rng=context.rng("aperiodic"), id_counter=context.job_ids,
+                                               periods=periods)
+
+        trace = Trace(verbosity=verbosity, sink=trace_sink)
+        if mode != PARTITIONED:
+            return schedule_multicore(processors, aperiodic_jobs, hyper_period, mode, trace, analytics)
+
+        columns = JobColumns() if analytics else None
+        all_jobs = []
+        for processor in processors:
+            processor.calculate_server_utilization()
+            trace.log(Verbosity.SUMMARY, "\nPROCESSOR:", processor)
+            processor.prepare_schedule(until=hyper_period, trace=trace)
+            selected_jobs = [job for job in aperiodic_jobs if processor.try_admit(job)]
+            for job in selected_jobs:
+                aperiodic_jobs.remove(job)
+            processor.trace_schedule()
+            if processor.metrics is not None:
+                processor.record_schedule_metrics()
+                trace.log(Verbosity.SUMMARY, processor.metrics)
+            all_jobs += processor.scheduled_jobs
+            if columns is not None:
+                columns.extend(processor.scheduled_jobs, processor.id)
+
+        all_jobs += aperiodic_jobs
+        if columns is not None:
+            columns.extend(aperiodic_jobs)
+            schedule_analytics = analyze(columns)
+            return ScheduleResult(schedule_analytics.quality_of_service, analytics=schedule_analytics)
+        return ScheduleResult(quality_of_service=calculate_quality_of_service(all_jobs))
+
+
+def schedule_multicore(processors: list[Processor], aperiodic_jobs: list[Job], hyper_period: int, mode: str,
+                       trace: Trace, analytics=False) -> ScheduleResult:
+    periodic_jobs = []
     for processor in processors:
         processor.calculate_server_utilization()
-        print("\nPROCESSOR:") if should_print else ...
-        print(processor) if should_print else ...
-        selected_jobs = []
-        for job in aperiodic_jobs:
-            job_copy = copy.deepcopy(job)
-            processor.add_aperiodic_job(job_copy)
-            for j in selected_jobs:
-                processor.add_aperiodic_job(copy.deepcopy(j))
-            try:
-                processor.edf_schedule(until=hyper_period, quiet=True)
-                selected_jobs.append(job)
-            except Exception:
-                pass
-            finally:
-                processor.reset_aperiodic_jobs()
-        for job in selected_jobs:
-            aperiodic_jobs.remove(job)
-        all_jobs += processor.edf_schedule(until=hyper_period, quiet=not should_print)
-
-    all_jobs += aperiodic_jobs
-    return calculate_quality_of_service(all_jobs)
+        processor.trace = trace
+        trace.log(Verbosity.SUMMARY, "\nPROCESSOR:", processor)
+        periodic_jobs.append(processor.create_all_jobs(hyper_period))
+
+    on_interval = trace.sink.write if trace.traces_intervals else None
+    engine = MulticoreEngine(processors, periodic_jobs, aperiodic_jobs, mode=mode, on_interval=on_interval)
+    engine.run()
+    trace.flush()
+    for processor, core_jobs, mode_switches in zip(processors, engine.core_jobs, engine.mode_switches):
+        if processor.metrics is not None:
+            # The engine keeps no metrics of its own; the drops and mode switches come from the schedule it produced.
+            processor.metrics.dropped_jobs = sum(job.dropped for job in core_jobs)
+            processor.metrics.mode_switches = mode_switches
+    # Jobs released late in the hyper period may finish after it, so the busy time is over the whole run.
+    core_utilizations = {
+        processor.id: util
+        for processor, util in zip(processors, engine.core_utilizations(max(hyper_period, engine.clock)))
+    }
+    core_quality_of_service = {
+        processor.id: calculate_quality_of_service(jobs) for processor, jobs in zip(processors, engine.core_jobs)
+    }
+    if trace.enabled(Verbosity.SUMMARY):
+        trace.log(
+            Verbosity.SUMMARY,
+            *(f"core {core} utilization: {util:.3f} quality_of_service: {core_quality_of_service[core]:.2f}"
+              for core, util in core_utilizations.items()),
+        )
+
+    schedule_analytics = None
+    if analytics:
+        # Jobs may migrate, so periodic jobs are attributed to the processor they were allocated to.
+        columns = JobColumns()
+        for processor, jobs in zip(processors, periodic_jobs):
+            columns.extend(jobs, processor.id)
+        columns.extend(aperiodic_jobs)
+        schedule_analytics = analyze(columns)
+    all_jobs = [job for jobs in periodic_jobs for job in jobs]
+    return ScheduleResult(
+        quality_of_service=calculate_quality_of_service(all_jobs + aperiodic_jobs),
+        core_utilizations=core_utilizations,
+        core_quality_of_service=core_quality_of_service,
+        analytics=schedule_analytics,
+    )
 
 
 if __name__ == "__main__":
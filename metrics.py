@@ -0,0 +1,72 @@
+JOB_CREATION = "job_creation_time"
+SIMULATION = "simulation_time"
+ADMISSION = "admission_time"
+
+
+class SchedulerMetrics:
+    """Counters and phase timings of the EDF runs of one processor, or merged over a whole schedule call.
+
+    Engines and processors only update it when one is attached, so leaving it out costs a None check
+    per dispatch. The runs that admission replays to try an aperiodic job are only counted under
+    `admission_replays` and `replay_dispatches`, and schedule() sets `mode_switches` and `dropped_jobs`
+    from the final schedule, so the other counters describe the schedule that was produced.
+    """
+
+    __slots__ = (
+        "dispatches", "preemptions", "mode_switches", "dropped_jobs", "budget_rejections",
+        "admission_replays", "replay_dispatches", "ready_queue_size_total", "max_ready_queue_size",
+        JOB_CREATION, SIMULATION, ADMISSION,
+    )
+
+    def __init__(self):
+        # Times a job was picked to run, whether newly started, resumed or preempting another.
+        self.dispatches: int = 0
+        self.preemptions: int = 0
+        # Switches from LO to HI mode, and the low criticality and aperiodic jobs dropped in HI mode.
+        self.mode_switches: int = 0
+        self.dropped_jobs: int = 0
+        # Aperiodic jobs refused because the server budget was exhausted.
+        self.budget_rejections: int = 0
+        # Partial runs replayed to try admitting aperiodic jobs, accepted or not, and their dispatches.
+        self.admission_replays: int = 0
+        self.replay_dispatches: int = 0
+        # Ready queue length sampled at every dispatch.
+        self.ready_queue_size_total: int = 0
+        self.max_ready_queue_size: int = 0
+        self.job_creation_time: float = 0
+        self.simulation_time: float = 0
+        self.admission_time: float = 0
+
+    def record_dispatch(self, ready_queue_size: int) -> None:
+        self.dispatches += 1
+        self.ready_queue_size_total += ready_queue_size
+        if ready_queue_size > self.max_ready_queue_size:
+            self.max_ready_queue_size = ready_queue_size
+
+    @property
+    def mean_ready_queue_size(self) -> float:
+        return self.ready_queue_size_total / self.dispatches if self.dispatches else 0
+
+    def merge(self, other: "SchedulerMetrics") -> "SchedulerMetrics":
+        for name in self.__slots__:
+            if name == "max_ready_queue_size":
+                self.max_ready_queue_size = max(self.max_ready_queue_size, other.max_ready_queue_size)
+            else:
+                setattr(self, name, getattr(self, name) + getattr(other, name))
+        return self
+
+    def as_dict(self) -> dict:
+        metrics = {name: getattr(self, name) for name in self.__slots__}
+        metrics["mean_ready_queue_size"] = self.mean_ready_queue_size
+        return metrics
+
+    def __str__(self) -> str:
+        return (
+            f"METRICS=> dispatches={self.dispatches} preemptions={self.preemptions} "
+            f"mode_switches={self.mode_switches} dropped_jobs={self.dropped_jobs} "
+            f"budget_rejections={self.budget_rejections} "
+            f"admission_replays={self.admission_replays} replay_dispatches={self.replay_dispatches} "
+            f"ready_queue(mean={self.mean_ready_queue_size:.2f} max={self.max_ready_queue_size}) "
+            f"job_creation={self.job_creation_time:.6f}s simulation={self.simulation_time:.6f}s "
+            f"admission={self.admission_time:.6f}s"
+        )
@@ -0,0 +1,227 @@
+import heapq
+import math
+from itertools import count
+from typing import Callable
+
+from engine import HI_MODE, LO_MODE
+from job import Job
+from processor import Processor
+
+PARTITIONED = "partitioned"
+GLOBAL_EDF = "global-edf"
+SEMI_PARTITIONED = "semi-partitioned"
+
+
+class MulticoreEngine:
+    """Simulates every core in one event loop, dispatching the earliest deadlines to the cores.
+
+    Core i runs the jobs of processors[i] that are pinned to it plus any migratable job from the
+    shared ready queue. With GLOBAL_EDF every job migrates; with SEMI_PARTITIONED only aperiodic and
+    low criticality jobs do, and high criticality jobs stay on the processor they were allocated to.
+
+    Aperiodic jobs are admitted on release against the servers' combined budget and rejected if it
+    is exhausted. Each processor has its own criticality mode, as on a single processor: when one of
+    its high criticality jobs overruns it switches to HI mode, its waiting low criticality jobs are
+    dropped and so are the ones it releases until none of its jobs is left to run, when it returns to
+    LO mode. A low criticality job already running on another core is left to finish.
+    """
+
+    def __init__(
+            self,
+            processors: list[Processor],
+            periodic_jobs: list[list[Job]],
+            aperiodic_jobs: list[Job],
+            mode: str = SEMI_PARTITIONED,
+            on_interval: Callable[[int, Job, float, float], None] | None = None,
+    ):
+        if mode not in (GLOBAL_EDF, SEMI_PARTITIONED):
+            raise ValueError(f"unknown multicore scheduling mode {mode!r}")
+        self.processors = processors
+        self.mode = mode
+        self.clock: float = 0
+        self.server_utilization: float = sum(processor.server_utilization for processor in processors)
+        self.scheduled_jobs: list[Job] = []
+        self.rejected_jobs: list[Job] = []
+        self.busy_time: list[float] = [0.0] * len(processors)
+        # The jobs each core finished, plus the dropped periodic jobs of the core's processor.
+        self.core_jobs: list[list[Job]] = [[] for _ in processors]
+        # Switches of each processor from LO to HI mode.
+        self.mode_switches: list[int] = [0] * len(processors)
+        # Entries are (time, tie-breaking key, job, index of the job's processor or -1 for aperiodic jobs).
+        self._release_queue: list[tuple[float, int, Job, int]] = []
+        self._global_queue: list[tuple[float, int, Job, int]] = []
+        self._core_queues: list[list[tuple[float, int, Job, int]]] = [[] for _ in processors]
+        self._running: list[tuple[float, int, Job, int] | None] = [None] * len(processors)
+        self._modes: list[str] = [LO_MODE] * len(processors)
+        # Released periodic jobs of each processor that have neither finished nor been dropped.
+        self._pending: list[int] = [0] * len(processors)
+        self._on_interval = on_interval
+
+        keys = count()
+        for origin, jobs in enumerate(periodic_jobs):
+            for job in jobs:
+                self._release_queue.append((job.release_time, next(keys), job, origin))
+        for job in aperiodic_jobs:
+            self._release_queue.append((job.release_time, next(keys), job, -1))
+        heapq.heapify(self._release_queue)
+
+    def core_utilizations(self, horizon: float) -> list[float]:
+        return [busy_time / horizon for busy_time in self.busy_time]
+
+    def _is_pinned(self, job: Job) -> bool:
+        return self.mode == SEMI_PARTITIONED and job.is_periodic and job.task.high_criticality
+
+    def _queue_of(self, job: Job, origin: int) -> list[tuple[float, int, Job, int]]:
+        return self._core_queues[origin] if self._is_pinned(job) else self._global_queue
+
+    def _release_jobs(self) -> None:
+        release_queue = self._release_queue
+        while release_queue and release_queue[0][0] <= self.clock:
+            _, key, job, origin = heapq.heappop(release_queue)
+            if not job.is_periodic:
+                aperiodic_job_utilization = job.calculate_utilization()
+                if aperiodic_job_utilization >= self.server_utilization:
+                    self.rejected_jobs.append(job)
+                    continue
+                self.server_utilization -= aperiodic_job_utilization
+            elif not job.task.high_criticality and self._modes[origin] == HI_MODE:
+                self._drop(job, origin)
+                continue
+            else:
+                self._pending[origin] += 1
+            heapq.heappush(self._queue_of(job, origin), (job.deadline, key, job, origin))
+
+    def _drop(self, job: Job, origin: int) -> None:
+        job.drop()
+        self.scheduled_jobs.append(job)
+        self.core_jobs[origin].append(job)
+        if self._on_interval is not None:
+            self._on_interval(self.processors[origin].id, job, job.release_time, job.release_time)
+
+    def _switch_to_high_mode(self, origin: int) -> None:
+        if self._modes[origin] == HI_MODE:
+            return
+        self._modes[origin] = HI_MODE
+        self.mode_switches[origin] += 1
+        # Low criticality jobs always migrate, so the waiting ones are all in the shared queue.
+        jobs_to_drop = [
+            entry for entry in self._global_queue
+            if entry[3] == origin and not entry[2].task.high_criticality and not entry[2].record.dropped
+        ]
+        jobs_to_drop.sort(key=lambda e: e[1])
+        for _, _, job, _ in jobs_to_drop:
+            self._drop(job, origin)
+        self._pending[origin] -= len(jobs_to_drop)
+
+    def _pop_live(self, queue: list[tuple[float, int, Job, int]]) -> tuple[float, int, Job, int] | None:
+        while queue:
+            entry = heapq.heappop(queue)
+            if not entry[2].record.dropped:
+                return entry
+        return None
+
+    def _choose_jobs(self) -> list[tuple[float, int, Job, int] | None]:
+        cores = range(len(self.processors))
+        running = self._running
+        for entry in running:
+            if entry is not None:
+                heapq.heappush(self._queue_of(entry[2], entry[3]), entry)
+
+        chosen = []
+        for queue in self._core_queues:
+            entry = self._pop_live(queue)
+            chosen.append(entry)
+        pinned = list(chosen)
+
+        migratable = []
+        for _ in cores:
+            entry = self._pop_live(self._global_queue)
+            if entry is None:
+                break
+            # The cores running the latest deadlines, idle ones first, are taken over first.
+            core = max(cores, key=lambda c: chosen[c][:2] if chosen[c] is not None else (math.inf, -1))
+            if chosen[core] is not None and chosen[core][:2] < entry[:2]:
+                heapq.heappush(self._global_queue, entry)
+                break
+            chosen[core] = entry
+            migratable.append(core)
+
+        for core, entry in enumerate(pinned):
+            if entry is not None and chosen[core] is not entry:
+                heapq.heappush(self._core_queues[core], entry)
+
+        # Keep a migratable job on the core it was already running on, so it only moves when it has to.
+        chosen_ids = {id(chosen[core]) for core in migratable}
+        staying = {core for core in migratable if running[core] is not None and id(running[core]) in chosen_ids}
+        staying_ids = {id(running[core]) for core in staying}
+        moving = [chosen[core] for core in migratable if id(chosen[core]) not in staying_ids]
+        for core in migratable:
+            chosen[core] = running[core] if core in staying else moving.pop()
+        return chosen
+
+    def _dispatch(self) -> None:
+        chosen = self._choose_jobs()
+        on_interval = self._on_interval
+        changed = [
+            core for core, (previous, entry) in enumerate(zip(self._running, chosen)) if previous is not entry
+        ]
+        # Every interval is closed before any is opened, so a job moving between cores ends one and starts the next.
+        for core in changed:
+            previous = self._running[core]
+            if previous is not None:
+                record = previous[2].record
+                record.intervals.append(self.clock)
+                if on_interval is not None:
+                    on_interval(self.processors[core].id, previous[2], record.intervals[-2], self.clock)
+        for core in changed:
+            entry = chosen[core]
+            if entry is not None:
+                job = entry[2]
+                job.record.intervals.append(self.clock)
+                if job.is_periodic and job.will_overrun:
+                    self._switch_to_high_mode(entry[3])
+        self._running = chosen
+
+    def _advance(self, time: float) -> None:
+        on_interval = self._on_interval
+        elapsed = time - self.clock
+        for core, entry in enumerate(self._running):
+            if entry is None:
+                continue
+            self.busy_time[core] += elapsed
+            job = entry[2]
+            record = job.record
+            if self.clock + record.remaining_execution_time <= time:
+                record.remaining_execution_time = 0
+                record.intervals.append(time)
+                if on_interval is not None:
+                    on_interval(self.processors[core].id, job, record.intervals[-2], time)
+                if job.is_aperiodic:
+                    self.server_utilization += job.calculate_utilization()
+                else:
+                    origin = entry[3]
+                    self._pending[origin] -= 1
+                    if not self._pending[origin]:
+                        self._modes[origin] = LO_MODE
+                self.scheduled_jobs.append(job)
+                self.core_jobs[core].append(job)
+                self._running[core] = None
+            else:
+                record.remaining_execution_time -= elapsed
+        self.clock = time
+
+    def run(self) -> list[Job]:
+        while True:
+            self._release_jobs()
+            self._dispatch()
+            next_time = min(
+                (self.clock + entry[2].record.remaining_execution_time
+                 for entry in self._running if entry is not None),
+                default=math.inf,
+            )
+            if self._release_queue:
+                next_time = min(next_time, self._release_queue[0][0])
+            if next_time == math.inf:
+                break
+            self._advance(next_time)
+        return self.scheduled_jobs
@@ -0,0 +1,46 @@
+import os
+from typing import Sequence
+
+from experiment import PointSummary
+
+# Figures are only ever written to files, so no display is needed.
+BACKEND = "Agg"
+
+
+def _pyplot():
+    # matplotlib takes longer to import than most short runs take to simulate, so only plotting pays for it.
+    import matplotlib
+    matplotlib.use(BACKEND)
+    import matplotlib.pyplot as plt
+    return plt
+
+
+def save_figure(path: str, x: Sequence, summaries: list[PointSummary], x_label: str, title: str,
+                ratio: str | None = None) -> str:
+    """Plots the quality of service of each summary against `x` and saves it to `path`.
+
+    With `ratio` "allocated" or "schedulable", the ratio of trials whose tasks were all allocated, or that
+    passed the EDF-VD test, is plotted instead.
+    """
+    plt = _pyplot()
+    figure, axes = plt.subplots()
+    if ratio is not None:
+        ratios = [getattr(s, f"{ratio}_ratio") for s in summaries]
+        intervals = [getattr(s, f"{ratio}_interval") for s in summaries]
+        # The Wilson interval is not symmetric around the ratio.
+        yerr = [[r - lower for r, (lower, _) in zip(ratios, intervals)],
+                [upper - r for r, (_, upper) in zip(ratios, intervals)]]
+        axes.errorbar(x, ratios, yerr=yerr, capsize=3)
+        axes.set_ylabel(f'{ratio} ratio')
+    else:
+        axes.errorbar(x, [s.quality_of_service_mean for s in summaries],
+                      yerr=[s.quality_of_service_ci for s in summaries], capsize=3)
+        axes.set_ylabel('quality_of_service')
+    axes.set_xlabel(x_label)
+    axes.set_title(title)
+    directory = os.path.dirname(path)
+    if directory:
+        os.makedirs(directory, exist_ok=True)
+    figure.savefig(path)
+    plt.close(figure)
+    return path
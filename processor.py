@@ -1,184 +1,381 @@
-import copy
+import bisect
+import heapq
+import random
+import time
+from contextlib import contextmanager
+from functools import partial
 from itertools import count
+from typing import Callable, Iterator, NamedTuple, Sequence
 
 import math
 
+from config import ONLINE_HISTORY
+from engine import Checkpoint, EDFEngine, OnlineEDFEngine, ServerUtilizationException
 from job import Job, PeriodicJob
+from metrics import ADMISSION, JOB_CREATION, SIMULATION, SchedulerMetrics
 from task import Task
-from utils import print_task_list, print_scheduled_periodic_job_list, decision
+from taskset import TaskSetProfile, scaling_factor, task_set_cache
+from tracing import QUIET, Trace, Verbosity
+from utils import decision, decisions
+
+
+class TaskReleases(NamedTuple):
+    task: Task
+    release_times: range
+    deadlines: Sequence[float]
+    overruns: list[bool]
+
+
+class ScheduleCycle(NamedTuple):
+    """Periodic schedule of one hyper period without overruns or aperiodic jobs.
+
+    It only exists when the last job finishes before the hyper period ends, in which case the
+    schedule repeats unchanged every hyper period.
+    """
+    # (task rank, instance number, execution intervals) in the order the jobs finished.
+    jobs: list[tuple[int, int, list[float]]]
+    # Idle instants of the cycle, the last one being where its last job finishes.
+    checkpoints: list[Checkpoint]
+    # The run's (dispatches, preemptions, ready_queue_size_total, max_ready_queue_size) from the previous
+    # idle instant, or the cycle's start, to each idle instant, so copies count what simulating would.
+    metrics: list[tuple[int, int, int, int]]
+
+
+class CycleEDFEngine(EDFEngine):
+    """EDFEngine that copies the schedule cycle wherever the schedule is known to follow it.
+
+    From an idle instant of the cycle up to the next aperiodic release or overrunning job, the jobs run
+    exactly as in the cycle, so that window is copied instead of simulated: once from the start, and
+    again each time the simulated schedule is idle at one of the cycle's idle instants after such a
+    perturbation. Being idle, and so in LO mode, with the same jobs to come, it goes on as the cycle does
+    whatever budget the server has left, just as try_admit's replays meet the previous schedule.
+    """
+
+    def __init__(
+            self,
+            jobs: list[Job],
+            until: int,
+            server_utilization: float,
+            tasks: list[Task],
+            hyper_period: int,
+            cycle: ScheduleCycle,
+            metrics: SchedulerMetrics | None = None,
+    ):
+        super().__init__(jobs, server_utilization, metrics=metrics)
+        self._tasks = tasks
+        self._hyper_period = hyper_period
+        self._cycle = cycle
+        self._until = until
+        self._perturbations = sorted(
+            job.release_time for job in jobs if not job.is_periodic or job.will_overrun
+        )
+        self._idle_clocks = [checkpoint.clock for checkpoint in cycle.checkpoints]
+        self._idle_offsets = {clock: index for index, clock in enumerate(self._idle_clocks)}
+        # The copy in progress stops before this time, the next perturbation or `until`.
+        self._limit: float = -math.inf
+
+    def _rejoined(self, checkpoint: Checkpoint) -> bool:
+        return (
+                self._limit < self._until
+                and checkpoint.released_until >= self._limit
+                and checkpoint.clock % self._hyper_period in self._idle_offsets
+        )
+
+    def _copy_cycle(self, cycle_start: float, index: int, after: float) -> list[Checkpoint]:
+        """Copies the cycle starting at `cycle_start` from its idle instant `index`, -1 being the cycle's
+        start, up to the last of its idle instants before the first perturbation after `after`.
+
+        Returns the checkpoints of the copied idle instants.
+        """
+        cycle = self._cycle
+        next_perturbation = bisect.bisect_right(self._perturbations, after)
+        limit = self._limit = min(
+            self._perturbations[next_perturbation] if next_perturbation < len(self._perturbations) else math.inf,
+            self._until,
+        )
+        server_utilization, mode_switches = self.server_utilization, self.mode_switches
+        copied: list[Checkpoint] = []
+        while True:
+            # Cycle idle instants index + 1 to end - 1 come before the limit.
+            end = bisect.bisect_left(self._idle_clocks, limit - cycle_start, lo=index + 1)
+            if end > index + 1:
+                last = cycle.checkpoints[end - 1]
+                released = {}
+                release_queue = self._release_queue
+                while release_queue and release_queue[0][0] - cycle_start <= last.clock:
+                    job = heapq.heappop(release_queue)[2]
+                    released[(job.task.id, job.release_time)] = job
+                self._live_jobs_count -= len(released)
+                first_count = cycle.checkpoints[index].scheduled_count if index >= 0 else 0
+                scheduled_count = len(self.scheduled_jobs) - first_count
+                for rank, instance_number, intervals in cycle.jobs[first_count:last.scheduled_count]:
+                    task = self._tasks[rank]
+                    job = released[(task.id, cycle_start + (instance_number - 1) * task.period)]
+                    job.record.intervals = (
+                        [time + cycle_start for time in intervals] if cycle_start else intervals.copy()
+                    )
+                    job.record.remaining_execution_time = 0
+                    self.scheduled_jobs.append(job)
+                copied += [
+                    Checkpoint(
+                        clock=checkpoint.clock + cycle_start,
+                        released_until=checkpoint.released_until + cycle_start,
+                        scheduled_count=checkpoint.scheduled_count + scheduled_count,
+                        server_utilization=server_utilization,
+                        mode_switches=mode_switches,
+                    )
+                    for checkpoint in cycle.checkpoints[index + 1:end]
+                ]
+                if self.metrics is not None:
+                    self._count_copied(cycle.metrics[index + 1:end])
+            if end < len(self._idle_clocks) or not self._release_queue:
+                break
+            cycle_start += self._hyper_period
+            index = -1
+        return copied
+
+    def _count_copied(self, segment_metrics: list[tuple[int, int, int, int]]) -> None:
+        metrics = self.metrics
+        for dispatches, preemptions, ready_queue_size_total, max_ready_queue_size in segment_metrics:
+            metrics.dispatches += dispatches
+            metrics.preemptions += preemptions
+            metrics.ready_queue_size_total += ready_queue_size_total
+            metrics.max_ready_queue_size = max(metrics.max_ready_queue_size, max_ready_queue_size)
+
+    def run(self) -> list[Job]:
+        copied = self._copy_cycle(cycle_start=0, index=-1, after=-math.inf)
+        while True:
+            if copied:
+                # The run goes on idle from the last copied instant, so it records that checkpoint itself.
+                self.checkpoints += copied[:-1]
+                self.clock = copied[-1].clock
+            super().run(stop=self._rejoined)
+            if self.stopped_at is None:
+                return self.scheduled_jobs
+            checkpoint = self.checkpoints.pop()
+            self.stopped_at = None
+            offset = checkpoint.clock % self._hyper_period
+            copied = [checkpoint] + self._copy_cycle(
+                checkpoint.clock - offset, self._idle_offsets[offset], after=checkpoint.clock
+            )
 
 
 class Processor:
     id_counter = count(start=1)
 
-    def __init__(self, overrun_prob):
-        self.id: int = next(self.id_counter)
+    def __init__(
+            self,
+            overrun_prob,
+            rng: random.Random = random,
+            id_counter: Iterator[int] | None = None,
+            job_ids: Iterator[int] | None = None,
+    ):
+        self.id: int = next(id_counter or self.id_counter)
         self.tasks: list[Task] = []
         self.aperiodic_jobs: list[Job] = []
         self.jobs: list[Job] = []
         self.util: float = 0
         self.server_utilization = None
         self.overrun_prob = overrun_prob
-        self._hyper_period = None
-        self.quiet = False
+        # Overrun decisions are drawn from `rng` and the periodic jobs take their ids from `job_ids`.
+        self.rng = rng
+        self.job_ids: Iterator[int] = job_ids or PeriodicJob.id_counter
+        self._profile: TaskSetProfile | None = None
+        self.trace: Trace = QUIET
+        self.metrics: SchedulerMetrics | None = None
+        self.scheduled_jobs: list[Job] = []
+        self._until: int | None = None
+        self._release_entries: list[tuple[float, int, Job]] = []
+        self._checkpoints: list[Checkpoint] = []
+
+    def profile(self) -> TaskSetProfile:
+        if self._profile is None:
+            self._profile = task_set_cache.profile(self.tasks)
+        return self._profile
 
     @property
     def hyper_period(self) -> int:
-        if self._hyper_period is None:
-            self._hyper_period = math.lcm(*[task.period for task in self.tasks])
-        return self._hyper_period
+        return self.profile().hyper_period
+
+    @property
+    def low_criticality_util(self) -> float:
+        return self.profile().low_criticality_util
+
+    @property
+    def high_criticality_util(self) -> float:
+        return self.profile().high_criticality_util
 
     def assign_task(self, task: Task):
         self.tasks.append(task)
         self.util += task.util
+        self._profile = None
 
     def get_remaining_util(self):
         return 1 - self.util
 
+    def edf_vd_slack(self) -> float:
+        """Largest server utilization s with U_low * x + 2 * U_high + s <= 1 and x = (U_high + s) / (1 - U_low).
+
+        Multiplying the constraint out by (1 - U_low) gives s <= (1 - U_low) * (1 - 2 * U_high) - U_low * U_high.
+        The result is negative when the tasks alone already violate it.
+        """
+        return self.profile().slack
+
     def calculate_server_utilization(self):
-        high_critical_tasks = list(filter(lambda task: task.high_criticality, self.tasks))
-        low_critical_tasks = list(filter(lambda task: not task.high_criticality, self.tasks))
+        self.server_utilization = self.profile().server_utilization
 
-        max_possible_server_util = 0
-        while True:
-            util = max_possible_server_util + 0.05
-            x = (util + sum([task.util for task in high_critical_tasks]) / (
-                    1 - sum([task.util for task in low_critical_tasks])))
-
-            sum_util = sum([task.util * x for task in low_critical_tasks]) + sum(
-                [task.util * 2 for task in high_critical_tasks]) + util
-            if sum_util <= 1:
-                max_possible_server_util = util
-            else:
-                break
-        self.server_utilization = max_possible_server_util
+    def is_edf_vd_schedulable(self) -> bool:
+        return self.util <= 1 and self.edf_vd_slack() >= 0
 
     def __str__(self) -> str:
         return f"PROC=> id={self.id}: util={self.util} tasks={[str(task) for task in self.tasks]}"
 
+    @contextmanager
+    def _measure(self, phase: str):
+        metrics = self.metrics
+        if metrics is None:
+            yield
+            return
+        started = time.perf_counter()
+        try:
+            yield
+        finally:
+            setattr(metrics, phase, getattr(metrics, phase) + time.perf_counter() - started)
+
     def create_all_jobs(self, until: int) -> list[Job]:
+        with self._measure(JOB_CREATION):
+            return self._create_all_jobs(until)
+
+    def _create_all_jobs(self, until: int) -> list[Job]:
         self.tasks.sort(key=lambda t: t.period)
 
-        print(f"Going to create Jobs from below tasks until {until}.") if not self.quiet else ...
-        print_task_list(self.tasks) if not self.quiet else ...
+        if self.trace.enabled(Verbosity.SUMMARY):
+            self.trace.log(
+                Verbosity.SUMMARY,
+                f"Going to create Jobs from below tasks until {until}.",
+                *sorted(self.tasks, key=lambda t: t.util, reverse=True),
+            )
 
         jobs: list[Job] = []
-        x = self.calculate_scaling_factor()
-        for task in self.tasks:
-            jobs += self.create_task_jobs(task, until, x)
+        for releases in self.generate_releases(until):
+            jobs += PeriodicJob.from_releases(
+                releases.task, releases.release_times, releases.deadlines, releases.overruns, self.job_ids
+            )
         return jobs
 
+    def generate_releases(self, until: int) -> list[TaskReleases]:
+        x = self.calculate_scaling_factor()
+        return [self.generate_task_releases(task, until, x) for task in self.tasks]
+
     def calculate_scaling_factor(self):
-        high_critical_tasks = list(filter(lambda task: task.high_criticality, self.tasks))
-        low_critical_tasks = list(filter(lambda task: not task.high_criticality, self.tasks))
+        profile = self.profile()
+        if self.server_utilization == profile.server_utilization:
+            return profile.scaling_factor
+        return scaling_factor(profile.low_criticality_util, profile.high_criticality_util, self.server_utilization)
 
-        U_low = sum(task.util for task in low_critical_tasks)
-        U_high = sum(task.util for task in high_critical_tasks) + self.server_utilization
+    @staticmethod
+    def virtual_relative_deadline(task: Task, x: float) -> float:
+        return task.period * x if task.high_criticality else task.period
 
-        if U_low >= 1:
-            return 0
-        return U_high / (1 - U_low)
+    def generate_task_releases(self, task: Task, until: int, x: float) -> TaskReleases:
+        release_times = range(0, until, task.period)
+        if task.high_criticality:
+            overruns = decisions(self.overrun_prob, len(release_times), self.rng)
+        else:
+            overruns = [False] * len(release_times)
+        deadlines = task_set_cache.release_deadlines(task.period, self.virtual_relative_deadline(task, x), until)
+        return TaskReleases(task=task, release_times=release_times, deadlines=deadlines, overruns=overruns)
 
-    def create_task_jobs(self, task: Task, until: int, x: float) -> list[Job]:
+    def schedule_cycle(self) -> ScheduleCycle | None:
+        """The cached overrun free schedule of one hyper period, for the tasks ordered as in create_all_jobs.
+
+        It only depends on the ordered tasks' timing and x, so processors and trials with the same ones share it.
+        """
+        x = self.calculate_scaling_factor()
+        key = (tuple((task.period, task.execution_time, task.high_criticality) for task in self.tasks), x)
+        return task_set_cache.schedule_cycles.get(key, lambda: self._simulate_schedule_cycle(x))
+
+    def _simulate_schedule_cycle(self, x: float) -> ScheduleCycle | None:
+        hyper_period = self.hyper_period
+        # The cycle's jobs never leave this method, so they do not take ids from the processor's counter.
+        ids = count(start=1)
         jobs: list[Job] = []
-        clock = 0
-        instance_number = 1
-        while clock < until:
-
-            will_overrun = False
-            if task.high_criticality:
-                will_overrun = decision(self.overrun_prob)
-
-            virtual_relative_deadline = task.period * x if task.high_criticality else task.period
-            jobs.append(
-                PeriodicJob(
-                    task=task,
-                    release_time=clock,
-                    deadline=clock + virtual_relative_deadline,
-                    instance_number=instance_number,
-                    will_overrun=will_overrun,
-                )
+        for task in self.tasks:
+            release_times = range(0, hyper_period, task.period)
+            deadlines = task_set_cache.release_deadlines(
+                task.period, self.virtual_relative_deadline(task, x), hyper_period
             )
-            clock += task.period
-            instance_number += 1
-        return jobs
+            jobs += PeriodicJob.from_releases(task, release_times, deadlines, [False] * len(release_times), ids)
+        metrics = SchedulerMetrics()
+        segment_metrics = []
+
+        def end_segment(checkpoint: Checkpoint | None = None) -> bool:
+            segment_metrics.append((
+                metrics.dispatches, metrics.preemptions, metrics.ready_queue_size_total,
+                metrics.max_ready_queue_size,
+            ))
+            metrics.dispatches = metrics.preemptions = metrics.ready_queue_size_total = 0
+            metrics.max_ready_queue_size = 0
+            return False
 
-    def pick_earliest_deadline_job(self, clock: float) -> Job | None:
-        earliest_deadline_job = None
-        for job in filter(lambda j: j.release_time <= clock, self.jobs):
-            if earliest_deadline_job is None:
-                earliest_deadline_job = job
-            elif job.deadline < earliest_deadline_job.deadline:
-                # if not (job.is_aperiodic and earliest_deadline_job.is_periodic):
-                earliest_deadline_job = job
-            else:
-                pass
-        return earliest_deadline_job
-
-    def pick_preempt_job(self, clock: float, deadline: float) -> Job | None:
-        preempt_jobs: list[Job] = list(
-            filter(lambda job: job.release_time <= clock and job.deadline < deadline, self.jobs)
+        engine = EDFEngine(jobs, 0, metrics=metrics)
+        engine.run(stop=end_segment)
+        end_segment()
+        if engine.clock >= hyper_period:
+            return None
+        ranks = {task.id: rank for rank, task in enumerate(self.tasks)}
+        return ScheduleCycle(
+            jobs=[(ranks[job.task.id], job.instance_number, job.record.intervals) for job in engine.scheduled_jobs],
+            checkpoints=[
+                checkpoint for checkpoint in engine.checkpoints if checkpoint.released_until == checkpoint.clock
+            ],
+            metrics=segment_metrics,
+        )
+
+    def create_engine(
+            self, jobs: list[Job], until: int, on_interval: Callable[[Job, float, float], None] | None = None
+    ) -> EDFEngine:
+        """An engine over `jobs`, the periodic jobs of create_all_jobs(until) followed by aperiodic ones.
+
+        Where the schedule is known to be the cached cycle, a CycleEDFEngine copies it instead of simulating
+        it. Copied intervals are not reported, so `on_interval` disables this.
+        """
+        cycle = None if on_interval is not None else self.schedule_cycle()
+        if cycle is None:
+            return EDFEngine(jobs, self.server_utilization, on_interval=on_interval, metrics=self.metrics)
+        return CycleEDFEngine(
+            jobs, until, self.server_utilization, self.tasks, self.hyper_period, cycle, metrics=self.metrics
+        )
+
+    def edf_schedule_jobs(self, until: int) -> list[Job]:
+        with self._measure(SIMULATION):
+            engine = self.create_engine(self.jobs, until, on_interval=self._interval_tracer())
+            try:
+                return engine.run()
+            finally:
+                self.server_utilization = engine.server_utilization
+                self.jobs = []
+
+    def create_online_engine(
+            self,
+            until: float = math.inf,
+            history: int | None = ONLINE_HISTORY,
+            overrun: Callable[[Task, int], bool] | None = None,
+    ) -> OnlineEDFEngine:
+        """An event-driven engine over this processor's tasks, releasing jobs as the simulation reaches them.
+
+        With the overrun decisions `edf_schedule` drew and the aperiodic jobs submitted in the same order,
+        it produces the same schedule as `edf_schedule(until)`. The engine keeps only the last `history`
+        finished or dropped jobs in `scheduled_jobs`; pass history=None to keep them all.
+        """
+        self.tasks.sort(key=lambda t: t.period)
+        if overrun is None:
+            overrun = lambda task, instance_number: decision(self.overrun_prob, self.rng)
+        return OnlineEDFEngine(
+            self.tasks, self.calculate_scaling_factor(), self.server_utilization, overrun,
+            until=until, history=history, on_interval=self._interval_tracer(), id_counter=self.job_ids,
+            metrics=self.metrics,
         )
-        preempt_jobs.sort(key=lambda job: job.release_time)
-        return preempt_jobs[0] if len(preempt_jobs) > 0 else None
-
-    def edf_schedule_jobs(self) -> list[Job]:
-        scheduled_jobs: list[Job] = []
-        clock = 0
-        active_job = None
-        while self.jobs:
-            if clock == 0 or active_job not in self.jobs:
-                clock = max(clock, min([job.release_time for job in self.jobs]))
-                active_job: Job = self.pick_earliest_deadline_job(clock)
-                active_job.start_time_list.append(clock)
-
-            if active_job.is_periodic:
-                active_job: PeriodicJob
-                if active_job.will_overrun:
-                    end_of_hyper_period = ((active_job.release_time // self.hyper_period) + 1) * self.hyper_period
-                    jobs_to_drop = list(
-                        filter(
-                            lambda job: (
-                                (job.is_periodic
-                                    and not job.task.high_criticality
-                                    and job.release_time <= end_of_hyper_period)) or not job.is_periodic,
-                            self.jobs,
-                        )
-                    )
-                    for job in jobs_to_drop:
-                        job.drop()
-                        self.jobs.remove(job)
-                        scheduled_jobs.append(job)
-            elif active_job.is_aperiodic and len(active_job.finish_time_list) == 0:
-                active_job: Job
-                aperiodic_job_utilization = active_job.calculate_utilization()
-                if aperiodic_job_utilization < self.server_utilization:
-                    self.server_utilization -= aperiodic_job_utilization
-                else:
-                    raise Exception("Server utilization exceeded!")
-
-            preempt_job = self.pick_preempt_job(
-                clock=clock + active_job.remaining_execution_time,
-                deadline=active_job.deadline,
-            )
-            if preempt_job is not None:
-                preempt_job: Job
-                active_job.remaining_execution_time -= preempt_job.release_time - active_job.start_time_list[-1]
-                active_job.finish_time_list.append(preempt_job.release_time)
-                preempt_job.start_time_list.append(preempt_job.release_time)
-                clock = preempt_job.release_time
-                active_job = preempt_job
-            else:
-                clock += active_job.remaining_execution_time
-                active_job.finish_time_list.append(clock)
-                active_job.remaining_execution_time = 0
-                if active_job.is_aperiodic:
-                    aperiodic_job_utilization = active_job.calculate_utilization()
-                    self.server_utilization += aperiodic_job_utilization
-                self.jobs.remove(active_job)
-                scheduled_jobs.append(active_job)
-
-        return scheduled_jobs
 
     def add_aperiodic_job(self, job: Job) -> None:
         self.aperiodic_jobs.append(job)
@@ -189,12 +386,148 @@ class Processor:
     def get_aperiodic_jobs(self, until: int) -> list[Job]:
         return list(filter(lambda j: j.release_time <= until, self.aperiodic_jobs))
 
-    def edf_schedule(self, until: int, quiet: bool = False) -> list[Job]:
-        self.quiet = quiet
-        print("\nEDF_SCHEDULE FUNCTION:") if not self.quiet else ...
+    def _interval_tracer(self):
+        if not self.trace.traces_intervals:
+            return None
+        return partial(self.trace.sink.write, self.id)
+
+    def edf_schedule(self, until: int, trace: Trace = QUIET) -> list[Job]:
+        self.trace = trace
+        self.trace.log(Verbosity.SUMMARY, "\nEDF_SCHEDULE FUNCTION:")
         self.jobs = self.create_all_jobs(until) + self.get_aperiodic_jobs(until)
-        scheduled_jobs = self.edf_schedule_jobs()
-        print("\nJOBS AFTER SCHEDULING:") if not self.quiet else ...
-        scheduled_periodic_jobs: list[PeriodicJob] = list(filter(lambda j: isinstance(j, PeriodicJob), scheduled_jobs))
-        print_scheduled_periodic_job_list(copy.deepcopy(scheduled_periodic_jobs)) if not self.quiet else ...
-        return scheduled_jobs
+        self.trace.log(Verbosity.TRACE, "\nJOBS AFTER SCHEDULING:")
+        try:
+            return self.edf_schedule_jobs(until)
+        finally:
+            self.trace.flush()
+
+    def prepare_schedule(self, until: int, trace: Trace = QUIET) -> None:
+        self.trace = trace
+        self.trace.log(Verbosity.SUMMARY, "\nEDF_SCHEDULE FUNCTION:")
+        self.reset_aperiodic_jobs()
+        self._until = until
+        periodic_jobs = self.create_all_jobs(until)
+        with self._measure(SIMULATION):
+            engine = self.create_engine(periodic_jobs, until)
+            self.scheduled_jobs = engine.run()
+        self._release_entries = sorted(
+            ((job.release_time, index, job) for index, job in enumerate(periodic_jobs)), key=lambda e: (e[0], e[1])
+        )
+        self._checkpoints = engine.checkpoints
+
+    def try_admit(self, job: Job) -> bool:
+        """Admits `job` if scheduling it with the jobs admitted so far keeps within the server budget.
+
+        Gives the same answer as re-running edf_schedule with every admitted job, but only replays
+        the schedule from the last idle instant before the job's release up to the first idle
+        instant where the new schedule meets the previous one again.
+
+        Admission only covers the horizon prepare_schedule was given. A job released after it is
+        accepted unchecked and left out of the schedule, as edf_schedule(until) leaves it out;
+        prepare a longer horizon to check it.
+        """
+        with self._measure(ADMISSION):
+            return self._try_admit(job)
+
+    def _try_admit(self, job: Job) -> bool:
+        if job.release_time > self._until:
+            # Beyond the prepared horizon: nothing to check it against, and the schedule never runs it.
+            self.add_aperiodic_job(job)
+            return True
+
+        entry = (job.release_time, len(self._release_entries), job)
+        checkpoints = self._checkpoints
+        start_index = bisect.bisect_left(checkpoints, job.release_time, key=lambda c: c.released_until) - 1
+        start = checkpoints[start_index]
+        release_entries = self._release_entries
+        release_queue = release_entries[
+            bisect.bisect_right(release_entries, start.released_until, key=lambda e: e[0]):
+        ]
+        bisect.insort_right(release_queue, entry, key=lambda e: e[0])
+
+        idle_checkpoints = {
+            checkpoint.clock: index
+            for index, checkpoint in enumerate(checkpoints)
+            if checkpoint.released_until == checkpoint.clock
+        }
+
+        def converged(checkpoint: Checkpoint) -> bool:
+            # Both schedules are idle and so in LO mode here; with the same budget left they go on identically.
+            index = idle_checkpoints.get(checkpoint.clock)
+            return (
+                    checkpoint.released_until >= job.release_time
+                    and index is not None
+                    and checkpoints[index].server_utilization == checkpoint.server_utilization
+            )
+
+        saved_records = {}
+
+        def touch(touched_job: Job) -> None:
+            if touched_job.id not in saved_records:
+                saved_records[touched_job.id] = (touched_job, touched_job.reset())
+
+        replay_metrics = SchedulerMetrics() if self.metrics is not None else None
+        engine = EDFEngine.resume(release_queue, start, touch, metrics=replay_metrics)
+        try:
+            window_jobs = engine.run(stop=converged)
+        except ServerUtilizationException:
+            for saved_job, record in saved_records.values():
+                saved_job.record = record
+            return False
+        finally:
+            if replay_metrics is not None:
+                self.metrics.admission_replays += 1
+                self.metrics.replay_dispatches += replay_metrics.dispatches
+                self.metrics.budget_rejections += replay_metrics.budget_rejections
+
+        offset = start.scheduled_count
+        new_checkpoints = checkpoints[:start_index + 1] + [
+            checkpoint._replace(scheduled_count=checkpoint.scheduled_count + offset)
+            for checkpoint in engine.checkpoints[1:]
+        ]
+        new_scheduled_jobs = self.scheduled_jobs[:offset] + window_jobs
+        if engine.stopped_at is not None:
+            end_index = idle_checkpoints[engine.stopped_at.clock]
+            end = checkpoints[end_index]
+            shift = len(new_scheduled_jobs) - end.scheduled_count
+            switch_shift = engine.stopped_at.mode_switches - end.mode_switches
+            new_checkpoints += [
+                checkpoint._replace(
+                    scheduled_count=checkpoint.scheduled_count + shift,
+                    mode_switches=checkpoint.mode_switches + switch_shift,
+                )
+                for checkpoint in checkpoints[end_index + 1:]
+            ]
+            new_scheduled_jobs += self.scheduled_jobs[end.scheduled_count:]
+
+        self.scheduled_jobs = new_scheduled_jobs
+        self._checkpoints = new_checkpoints
+        self._insert_release_entry(entry)
+        self.add_aperiodic_job(job)
+        return True
+
+    def record_schedule_metrics(self) -> None:
+        """Sets the metrics' drop and mode switch counts to those of the prepared schedule, admissions included."""
+        self.metrics.dropped_jobs = sum(job.dropped for job in self.scheduled_jobs)
+        self.metrics.mode_switches = self._checkpoints[-1].mode_switches
+
+    def trace_schedule(self) -> None:
+        """Streams the prepared schedule, including the admitted aperiodic jobs, to the trace sink.
+
+        Admissions splice the schedule together from partial runs, so the final schedule is replayed
+        once with the sink attached rather than tracing every run it was assembled from.
+        """
+        if not self.trace.traces_intervals:
+            return
+        self.trace.log(Verbosity.TRACE, "\nJOBS AFTER SCHEDULING:")
+        jobs = [job for _, _, job in sorted(self._release_entries, key=lambda e: e[1])]
+        for job in jobs:
+            job.reset()
+        engine = EDFEngine(
+            jobs, self._checkpoints[0].server_utilization, on_interval=self._interval_tracer()
+        )
+        self.scheduled_jobs = engine.run()
+        self.trace.flush()
+
+    def _insert_release_entry(self, entry: tuple[float, int, Job]) -> None:
+        bisect.insort_right(self._release_entries, entry, key=lambda e: e[0])
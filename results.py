@@ -0,0 +1,222 @@
+import json
+import math
+import os
+import sys
+from array import array
+from typing import NamedTuple
+
+from config import RESULTS_CHUNK_SIZE
+
+# Column name, array typecode. Missing values are stored as NaN or -1.
+COLUMNS = [
+    ("params_id", "I"),
+    ("seed", "Q"),
+    ("quality_of_service", "d"),
+    ("schedulable", "b"),
+    ("simulated", "b"),
+    ("allocated", "b"),
+    ("dropped_jobs", "q"),
+    ("runtime", "d"),
+    ("error_offsets", "Q"),
+]
+PARAMS_FILE = "params.jsonl"
+CHUNK_PREFIX = "chunk-"
+
+
+def params_key(params: dict) -> str:
+    return json.dumps(params, sort_keys=True, default=str)
+
+
+class TrialRecord(NamedTuple):
+    params: dict
+    seed: int
+    quality_of_service: float | None
+    schedulable: bool
+    simulated: bool | None
+    dropped_jobs: int | None
+    runtime: float
+    error: str | None
+    allocated: bool | None = None
+
+
+class ResultColumns:
+    """Every stored trial as one array per column, plus the parameter sets the `params_id` column indexes."""
+
+    def __init__(self, params: list[dict]):
+        self.params = params
+        self.columns: dict[str, array] = {name: array(typecode) for name, typecode in COLUMNS}
+        self.errors = bytearray()
+        self.columns["error_offsets"].append(0)
+
+    def __len__(self) -> int:
+        return len(self.columns["seed"])
+
+    def __getitem__(self, name: str) -> array:
+        return self.columns[name]
+
+    def error(self, row: int) -> str | None:
+        offsets = self.columns["error_offsets"]
+        if offsets[row] == offsets[row + 1]:
+            return None
+        return self.errors[offsets[row]:offsets[row + 1]].decode()
+
+    def record(self, row: int) -> TrialRecord:
+        columns = self.columns
+        quality_of_service = columns["quality_of_service"][row]
+        simulated = columns["simulated"][row]
+        dropped_jobs = columns["dropped_jobs"][row]
+        allocated = columns["allocated"][row]
+        return TrialRecord(
+            params=self.params[columns["params_id"][row]],
+            seed=columns["seed"][row],
+            quality_of_service=None if math.isnan(quality_of_service) else quality_of_service,
+            schedulable=bool(columns["schedulable"][row]),
+            simulated=None if simulated < 0 else bool(simulated),
+            dropped_jobs=None if dropped_jobs < 0 else dropped_jobs,
+            runtime=columns["runtime"][row],
+            error=self.error(row),
+            allocated=None if allocated < 0 else bool(allocated),
+        )
+
+    def records(self) -> list[TrialRecord]:
+        return [self.record(row) for row in range(len(self))]
+
+
+class ResultStore:
+    """Append-only columnar store of trial results in a directory.
+
+    Trials are buffered in memory and written `chunk_size` at a time as a chunk file holding one
+    contiguous array per column, so a sweep that dies loses at most its unwritten chunk. Each chunk is
+    written to a temporary file and renamed into place, and the parameter sets are appended to
+    params.jsonl before the first chunk that uses them.
+    """
+
+    def __init__(self, path: str, chunk_size: int = RESULTS_CHUNK_SIZE):
+        self.path = path
+        self.chunk_size = chunk_size
+        os.makedirs(path, exist_ok=True)
+        self._params: list[dict] = []
+        # params_key of each parameter set, by params_id.
+        self._params_keys: list[str] = []
+        self._params_ids: dict[str, int] = {}
+        # Built from the chunks on the first completed() call, then kept up to date by append.
+        self._completed: dict[tuple[str, int], TrialRecord] | None = None
+        self._saved_params_count = 0
+        params_path = os.path.join(path, PARAMS_FILE)
+        if os.path.exists(params_path):
+            with open(params_path) as file:
+                for line in file:
+                    self._add_params(json.loads(line))
+            self._saved_params_count = len(self._params)
+        self._chunk_count = len(self._chunk_names())
+        self._buffer = ResultColumns(self._params)
+
+    def _add_params(self, params: dict) -> int:
+        key = params_key(params)
+        params_id = self._params_ids.get(key)
+        if params_id is None:
+            params_id = self._params_ids[key] = len(self._params)
+            self._params.append(params)
+            self._params_keys.append(key)
+        return params_id
+
+    def _chunk_names(self) -> list[str]:
+        return sorted(
+            name for name in os.listdir(self.path) if name.startswith(CHUNK_PREFIX) and name.endswith(".bin")
+        )
+
+    def append(self, record: TrialRecord) -> None:
+        columns = self._buffer.columns
+        params_id = self._add_params(record.params)
+        columns["params_id"].append(params_id)
+        columns["seed"].append(record.seed)
+        columns["quality_of_service"].append(
+            math.nan if record.quality_of_service is None else record.quality_of_service
+        )
+        columns["schedulable"].append(record.schedulable)
+        columns["simulated"].append(-1 if record.simulated is None else record.simulated)
+        columns["allocated"].append(-1 if record.allocated is None else record.allocated)
+        columns["dropped_jobs"].append(-1 if record.dropped_jobs is None else record.dropped_jobs)
+        columns["runtime"].append(record.runtime)
+        if record.error is not None:
+            self._buffer.errors += record.error.encode()
+        columns["error_offsets"].append(len(self._buffer.errors))
+        if self._completed is not None:
+            self._completed[(self._params_keys[params_id], record.seed)] = record
+        if len(self._buffer) >= self.chunk_size:
+            self.flush()
+
+    def flush(self) -> None:
+        if not len(self._buffer):
+            return
+        if self._saved_params_count < len(self._params):
+            with open(os.path.join(self.path, PARAMS_FILE), "a") as file:
+                for key in self._params_keys[self._saved_params_count:]:
+                    file.write(key + "\n")
+            self._saved_params_count = len(self._params)
+
+        buffer = self._buffer
+        header = {
+            "rows": len(buffer),
+            "byteorder": sys.byteorder,
+            "columns": [[name, typecode, len(buffer.columns[name]) * buffer.columns[name].itemsize]
+                        for name, typecode in COLUMNS] + [["errors", "B", len(buffer.errors)]],
+        }
+        chunk_path = os.path.join(self.path, f"{CHUNK_PREFIX}{self._chunk_count:06d}.bin")
+        with open(chunk_path + ".tmp", "wb") as file:
+            file.write(json.dumps(header).encode() + b"\n")
+            for name, _ in COLUMNS:
+                buffer.columns[name].tofile(file)
+            file.write(buffer.errors)
+        os.replace(chunk_path + ".tmp", chunk_path)
+        self._chunk_count += 1
+        self._buffer = ResultColumns(self._params)
+
+    def close(self) -> None:
+        self.flush()
+
+    def __enter__(self) -> "ResultStore":
+        return self
+
+    def __exit__(self, *exc_info) -> None:
+        self.close()
+
+    def load(self) -> ResultColumns:
+        """Reads every written chunk into one array per column."""
+        loaded = ResultColumns(list(self._params))
+        for name in self._chunk_names():
+            with open(os.path.join(self.path, name), "rb") as file:
+                header = json.loads(file.readline())
+                error_base = len(loaded.errors)
+                # Chunks written before a column existed read it as missing.
+                written = {column for column, _, _ in header["columns"]}
+                for column, typecode in COLUMNS:
+                    if column not in written:
+                        loaded.columns[column].extend([-1] * header["rows"])
+                for column, typecode, size in header["columns"]:
+                    values = array(typecode)
+                    values.frombytes(file.read(size))
+                    if header["byteorder"] != sys.byteorder:
+                        values.byteswap()
+                    if column == "errors":
+                        loaded.errors += values
+                    elif column == "error_offsets":
+                        # Each chunk's offsets start at 0 and index its own error bytes.
+                        loaded.columns[column].extend(offset + error_base for offset in values[1:])
+                    else:
+                        loaded.columns[column].extend(values)
+        return loaded
+
+    def completed(self) -> dict[tuple[str, int], TrialRecord]:
+        """The stored trials keyed by (params_key(params), seed), written or still buffered.
+
+        The chunks are only read on the first call; the returned index is the store's own, updated as
+        trials are appended, so callers must not modify it.
+        """
+        if self._completed is None:
+            self._completed = {}
+            for columns in (self.load(), self._buffer):
+                params_ids = columns["params_id"]
+                for row in range(len(columns)):
+                    self._completed[(self._params_keys[params_ids[row]], columns["seed"][row])] = columns.record(row)
+        return self._completed
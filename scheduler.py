@@ -0,0 +1,176 @@
+"""Command line entry point: python -m scheduler run|sweep|bench.
+
+Only argparse and config are imported up front; each command imports the simulation modules it needs, and
+matplotlib is only imported when a sweep is asked to save a plot.
+"""
+import argparse
+import sys
+
+from config import NUMBER_OF_TASKS, PERIODS, RESULTS_PATH
+
+# Sweepable schedule() parameters by their command line name, with the type of their values.
+SIMULATION_PARAMETERS = {
+    "overrun_probability": float,
+    "sum_util": float,
+    "number_of_aperiodic_jobs": int,
+    "number_of_processors": int,
+    "number_of_tasks": int,
+}
+
+
+def int_list(value: str) -> list[int]:
+    return [int(item) for item in value.split(",")]
+
+
+def parse_vary(value: str) -> tuple[str, list]:
+    name, _, values = value.partition("=")
+    if name not in SIMULATION_PARAMETERS or not values:
+        raise argparse.ArgumentTypeError(
+            f"expected NAME=V1,V2,... with NAME one of {', '.join(SIMULATION_PARAMETERS)}"
+        )
+    return name, [SIMULATION_PARAMETERS[name](item) for item in values.split(",")]
+
+
+def add_simulation_arguments(parser: argparse.ArgumentParser) -> None:
+    parser.add_argument("--overrun-probability", dest="overrun_probability", type=float, default=0.2)
+    parser.add_argument("--sum-util", dest="sum_util", type=float, default=None,
+                        help="total utilization, half the processor count by default")
+    parser.add_argument("--aperiodic-jobs", dest="number_of_aperiodic_jobs", type=int, default=40)
+    parser.add_argument("--processors", dest="number_of_processors", type=int, default=8)
+    parser.add_argument("--tasks", dest="number_of_tasks", type=int, default=NUMBER_OF_TASKS)
+    parser.add_argument("--periods", type=int_list, default=PERIODS, help="comma separated task periods")
+    parser.add_argument("--mode", help="partitioned (default), global-edf or semi-partitioned")
+    parser.add_argument("--heuristic", dest="allocation_heuristic",
+                        help="first-fit, best-fit (default), worst-fit or criticality-aware-best-fit")
+    parser.add_argument("--schedulability-only", dest="schedulability_only", action="store_true")
+
+
+def simulation_params(args: argparse.Namespace) -> dict:
+    params = {
+        "overrun_probability": args.overrun_probability,
+        "sum_util": args.sum_util,
+        "number_of_aperiodic_jobs": args.number_of_aperiodic_jobs,
+        "number_of_processors": args.number_of_processors,
+    }
+    # Defaults stay out of the params so stored results keep matching runs that did not set them.
+    if args.number_of_tasks != NUMBER_OF_TASKS:
+        params["number_of_tasks"] = args.number_of_tasks
+    if args.periods != PERIODS:
+        params["periods"] = args.periods
+    for name in ("mode", "allocation_heuristic"):
+        if getattr(args, name) is not None:
+            params[name] = getattr(args, name)
+    if args.schedulability_only:
+        params["schedulability_only"] = True
+    return params
+
+
+def with_default_util(params: dict) -> dict:
+    if params["sum_util"] is None:
+        return {**params, "sum_util": 0.5 * params["number_of_processors"]}
+    return params
+
+
+def run(args: argparse.Namespace) -> int:
+    from main import schedule
+    from tracing import Verbosity
+
+    result = schedule(**with_default_util(simulation_params(args)), seed=args.seed,
+                      verbosity=Verbosity[args.verbosity.upper()], analytics=args.analytics)
+    if result.quality_of_service is None:
+        print(f"schedulable={result.schedulable}")
+        return 0
+    if args.analytics:
+        analytics = result.analytics
+        print(f"quality_of_service={analytics.quality_of_service:.2f} drop_rate={analytics.drop_rate:.3f} "
+              f"jobs={analytics.jobs}")
+        for level, level_analytics in analytics.levels.items():
+            print(f"  {level}: jobs={level_analytics.jobs} dropped={level_analytics.dropped} "
+                  f"misses={level_analytics.misses}")
+    else:
+        print(f"quality_of_service={result.quality_of_service:.2f}")
+    if result.core_utilizations is not None:
+        for core, util in result.core_utilizations.items():
+            print(f"  core {core}: utilization={util:.3f} "
+                  f"quality_of_service={result.core_quality_of_service[core]:.2f}")
+    return 0
+
+
+def sweep(args: argparse.Namespace) -> int:
+    from experiment import ExperimentRunner, format_table
+    from results import ResultStore
+
+    name, values = args.vary
+    points = [with_default_util({**simulation_params(args), name: value}) for value in values]
+    store = ResultStore(args.store) if args.store else None
+    runner = ExperimentRunner(
+        max_workers=args.workers, root_seed=args.seed, cross_check_every=args.cross_check_every, store=store
+    )
+    try:
+        if args.target_ci is not None:
+            summaries = runner.run_adaptive(points, target_ci=args.target_ci, max_trials=args.trials)
+        else:
+            summaries = runner.run(points, args.trials)
+    finally:
+        if store is not None:
+            store.close()
+    print(format_table(summaries))
+
+    if args.plot:
+        from plots import save_figure
+        title = " ".join(f"{key}={value}" for key, value in points[0].items() if key != name)
+        ratio = args.ratio if args.schedulability_only else None
+        save_figure(args.plot, values, summaries, x_label=name, title=title, ratio=ratio)
+        print(f"saved {args.plot}")
+    return 0
+
+
+def bench(args: argparse.Namespace) -> int:
+    import bench
+    return bench.main(args.bench_args)
+
+
+def main(argv: list[str] | None = None) -> int:
+    parser = argparse.ArgumentParser(prog="python -m scheduler", description="Mixed-criticality EDF-VD simulations.")
+    commands = parser.add_subparsers(dest="command", required=True)
+
+    run_parser = commands.add_parser("run", help="simulate one system and print its quality of service")
+    add_simulation_arguments(run_parser)
+    run_parser.add_argument("--seed", type=int, help="seed for a reproducible run, unseeded by default")
+    run_parser.add_argument("--verbosity", choices=["quiet", "summary", "trace"], default="quiet")
+    run_parser.add_argument("--analytics", action="store_true", help="print per criticality statistics")
+    run_parser.set_defaults(handler=run)
+
+    sweep_parser = commands.add_parser("sweep", help="run trials over the values of one parameter")
+    add_simulation_arguments(sweep_parser)
+    sweep_parser.add_argument("--vary", type=parse_vary, required=True, metavar="NAME=V1,V2,...",
+                              help=f"parameter to sweep, one of {', '.join(SIMULATION_PARAMETERS)}")
+    sweep_parser.add_argument("--trials", type=int, default=100,
+                              help="trials per point, or the most per point with --target-ci")
+    sweep_parser.add_argument("--target-ci", dest="target_ci", type=float,
+                              help="stop each point once its confidence interval is this narrow")
+    sweep_parser.add_argument("--seed", type=int, default=0, help="root seed of the trials")
+    sweep_parser.add_argument("--workers", type=int, help="worker processes, one per CPU by default")
+    sweep_parser.add_argument("--cross-check-every", dest="cross_check_every", type=int, default=0)
+    sweep_parser.add_argument("--store", nargs="?", const=RESULTS_PATH,
+                              help=f"keep trials in a resumable results store ({RESULTS_PATH} if no path is given)")
+    sweep_parser.add_argument("--plot", help="save a plot of the sweep to this file (png, pdf, svg)")
+    sweep_parser.add_argument("--ratio", choices=["allocated", "schedulable"], default="allocated",
+                              help="ratio a --schedulability-only plot shows: tasks all allocated (default) or "
+                                   "passing the EDF-VD test")
+    sweep_parser.set_defaults(handler=sweep)
+
+    # Everything after `bench` goes to bench.py's own parser.
+    bench_parser = commands.add_parser("bench", help="benchmark the scheduler hot paths", add_help=False)
+    bench_parser.set_defaults(handler=bench)
+
+    args, unknown = parser.parse_known_args(argv)
+    if args.command == "bench":
+        args.bench_args = unknown
+    elif unknown:
+        parser.error(f"unrecognized arguments: {' '.join(unknown)}")
+    return args.handler(args)
+
+
+if __name__ == "__main__":
+    sys.exit(main())
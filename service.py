@@ -0,0 +1,205 @@
+import argparse
+import asyncio
+import json
+import os
+from concurrent.futures import ProcessPoolExecutor
+from typing import Any
+
+from analytics import JobColumns, analyze
+from experiment import TrialResult, run_trial, summarize, trial_seed
+from job import Job
+from processor import Processor
+from simulation import SimulationContext
+from task import Task
+
+DEFAULT_HOST = "127.0.0.1"
+DEFAULT_PORT = 8765
+
+
+class ServiceError(Exception):
+    pass
+
+
+def to_json(value: Any) -> Any:
+    """Plain JSON data for results made of named tuples, dicts and lists."""
+    if hasattr(value, "_asdict"):
+        return {key: to_json(item) for key, item in value._asdict().items()}
+    if isinstance(value, dict):
+        return {str(key): to_json(item) for key, item in value.items()}
+    if isinstance(value, (list, tuple)):
+        return [to_json(item) for item in value]
+    if hasattr(value, "as_dict"):
+        return value.as_dict()
+    return value
+
+
+def trial_payload(result: TrialResult) -> dict:
+    return {
+        "point": result.point,
+        "seed": result.seed,
+        "quality_of_service": result.quality_of_service,
+        "schedulable": result.schedulable,
+        "simulated": result.simulated,
+        "allocated": result.allocated,
+        "error": result.error,
+        "runtime": result.runtime,
+        "analytics": to_json(result.analytics),
+    }
+
+
+def job_payload(job: Job) -> dict:
+    return {
+        "id": job.id,
+        "task": job.task.id if job.is_periodic else None,
+        "release_time": job.release_time,
+        "deadline": job.deadline,
+        "execution_time": job.execution_time,
+        "intervals": job.execution_intervals,
+        "dropped": job.dropped,
+    }
+
+
+def run_edf_schedule(params: dict) -> dict:
+    """Schedules the given task set and aperiodic jobs on one processor with `Processor.edf_schedule`."""
+    context = SimulationContext(params.get("seed"))
+    processor = Processor(
+        params.get("overrun_probability", 0), rng=context.rng("overruns", 0), id_counter=context.processor_ids,
+        job_ids=context.job_ids,
+    )
+    for task in params["tasks"]:
+        util = task["util"] if "util" in task else task["execution_time"] / task["period"]
+        processor.assign_task(Task(
+            period=task["period"], util=util, execution_time=task.get("execution_time", util * task["period"]),
+            high_criticality=task["high_criticality"], id_counter=context.task_ids,
+        ))
+    for job in params.get("aperiodic_jobs", []):
+        processor.add_aperiodic_job(Job(
+            release_time=job["release_time"], deadline=job["deadline"], execution_time=job["execution_time"],
+            id_counter=context.job_ids,
+        ))
+    if not processor.is_edf_vd_schedulable():
+        raise ServiceError("the task set is not EDF-VD schedulable")
+    processor.calculate_server_utilization()
+    until = params.get("until", processor.hyper_period)
+    jobs = processor.edf_schedule(until=until)
+    return {
+        "hyper_period": processor.hyper_period,
+        "server_utilization": processor.server_utilization,
+        "jobs": [job_payload(job) for job in jobs],
+        "analytics": to_json(analyze(JobColumns.from_jobs(jobs, processor.id))),
+    }
+
+
+class SimulationService:
+    """Newline-delimited JSON requests over TCP or a Unix socket, served from a persistent worker pool.
+
+    Every request is an object {"id": ..., "method": ..., "params": {...}} and every response line echoes
+    the id. Methods:
+
+    - "ping": answers {"result": "pong"}.
+    - "schedule": one `schedule` trial with `params` as its arguments plus "seed"; answers its TrialResult.
+    - "sweep": `params` {"points": [...], "trials": n, "root_seed": 0}; streams one {"trial": ...} line per
+      finished trial in completion order, then {"result": [point summaries]}.
+    - "edf_schedule": one processor's `edf_schedule` for explicit "tasks" and "aperiodic_jobs"; answers the
+      scheduled jobs and their analytics.
+
+    Failures answer {"error": message}. The workers live as long as the service, so the UUniFast samples and
+    task set caches they build up are reused by later requests.
+    """
+
+    def __init__(self, max_workers: int | None = None):
+        self.max_workers = max_workers or os.cpu_count() or 1
+        self.executor: ProcessPoolExecutor | None = None
+
+    async def __aenter__(self) -> "SimulationService":
+        self.executor = ProcessPoolExecutor(max_workers=self.max_workers)
+        return self
+
+    async def __aexit__(self, *exc_info) -> None:
+        self.executor.shutdown(cancel_futures=True)
+
+    async def _run(self, function, *args):
+        return await asyncio.get_running_loop().run_in_executor(self.executor, function, *args)
+
+    async def handle(self, reader: asyncio.StreamReader, writer: asyncio.StreamWriter) -> None:
+        async def send(message: dict) -> None:
+            writer.write(json.dumps(message).encode() + b"\n")
+            await writer.drain()
+
+        try:
+            while line := await reader.readline():
+                request_id = None
+                try:
+                    request = json.loads(line)
+                    if not isinstance(request, dict):
+                        raise ServiceError(f"expected a request object, got {type(request).__name__}")
+                    request_id = request.get("id")
+                    await self.dispatch(request.get("method"), request.get("params") or {},
+                                        lambda message: send({"id": request_id, **message}))
+                except ConnectionError:
+                    raise
+                except Exception as e:
+                    # One bad request answers an error instead of closing the stream.
+                    await send({"id": request_id, "error": repr(e)})
+        except ConnectionError:
+            pass
+        finally:
+            writer.close()
+
+    async def dispatch(self, method: str, params: dict, send) -> None:
+        if method == "ping":
+            await send({"result": "pong"})
+        elif method == "schedule":
+            params = dict(params)
+            seed = params.pop("seed", 0)
+            result = await self._run(run_trial, params, 0, seed)
+            await send({"result": trial_payload(result)})
+        elif method == "sweep":
+            await self.sweep(params, send)
+        elif method == "edf_schedule":
+            await send({"result": await self._run(run_edf_schedule, params)})
+        else:
+            raise ServiceError(f"unknown method {method!r}")
+
+    async def sweep(self, params: dict, send) -> None:
+        points = params["points"]
+        root_seed = params.get("root_seed", 0)
+        results: list[list[TrialResult]] = [[] for _ in points]
+        futures = [
+            self._run(run_trial, point_params, point, trial_seed(root_seed, point, trial))
+            for point, point_params in enumerate(points) for trial in range(params["trials"])
+        ]
+        for future in asyncio.as_completed(futures):
+            result = await future
+            results[result.point].append(result)
+            await send({"trial": trial_payload(result)})
+        await send({"result": [to_json(summarize(point_params, point_results))
+                               for point_params, point_results in zip(points, results)]})
+
+
+async def serve(host: str = DEFAULT_HOST, port: int = DEFAULT_PORT, unix_socket: str | None = None,
+                max_workers: int | None = None) -> None:
+    async with SimulationService(max_workers) as service:
+        if unix_socket is not None:
+            server = await asyncio.start_unix_server(service.handle, path=unix_socket)
+        else:
+            server = await asyncio.start_server(service.handle, host=host, port=port)
+        async with server:
+            await server.serve_forever()
+
+
+def main(argv: list[str] | None = None) -> None:
+    parser = argparse.ArgumentParser(description="Serves scheduling simulations over newline-delimited JSON.")
+    parser.add_argument("--host", default=DEFAULT_HOST)
+    parser.add_argument("--port", type=int, default=DEFAULT_PORT)
+    parser.add_argument("--unix-socket", help="listen on this Unix socket instead of TCP")
+    parser.add_argument("--workers", type=int, help="worker processes, one per CPU by default")
+    args = parser.parse_args(argv)
+    try:
+        asyncio.run(serve(args.host, args.port, args.unix_socket, args.workers))
+    except KeyboardInterrupt:
+        pass
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,32 @@
+import hashlib
+import random
+from itertools import count
+
+
+def derive_seed(*path) -> int:
+    digest = hashlib.blake2b("/".join(str(part) for part in path).encode(), digest_size=8).digest()
+    return int.from_bytes(digest, "big")
+
+
+class SimulationContext:
+    """Random streams and id counters of one simulation.
+
+    Every source of randomness draws from its own stream, seeded from `seed` and the stream's name, so a
+    trial is reproduced from its seed alone whatever other trials or streams drew before it. Without a
+    seed every stream is the global `random` module, drawn from in the same order as before streams.
+    """
+
+    def __init__(self, seed: int | None = None):
+        self.seed = seed
+        self.task_ids = count(start=1)
+        self.job_ids = count(start=1)
+        self.processor_ids = count(start=1)
+        self._streams: dict[tuple, random.Random] = {}
+
+    def rng(self, *name) -> random.Random:
+        if self.seed is None:
+            return random
+        stream = self._streams.get(name)
+        if stream is None:
+            stream = self._streams[name] = random.Random(derive_seed(self.seed, *name))
+        return stream
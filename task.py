@@ -1,11 +1,21 @@
 from itertools import count
+from typing import Iterator
 
 
 class Task:
+    __slots__ = ("id", "period", "util", "execution_time", "high_criticality")
+
     id_counter = count(start=1)
 
-    def __init__(self, period: int, util: float, execution_time: float, high_criticality: bool):
-        self.id: int = next(self.id_counter)
+    def __init__(
+            self,
+            period: int,
+            util: float,
+            execution_time: float,
+            high_criticality: bool,
+            id_counter: Iterator[int] | None = None,
+    ):
+        self.id: int = next(id_counter or self.id_counter)
         self.period: int = period
         self.util: float = util
         self.execution_time: float = execution_time
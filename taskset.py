@@ -0,0 +1,111 @@
+import math
+from collections import OrderedDict
+from typing import Callable, Hashable, Iterable, NamedTuple, TypeVar
+
+from config import TASK_SET_CACHE_MAX_ENTRIES
+from task import Task
+
+T = TypeVar("T")
+
+
+def task_set_fingerprint(tasks: Iterable[Task]) -> tuple[tuple[int, float, bool], ...]:
+    """Canonical (period, util, high criticality) tuple of a task set, whatever order its tasks are in."""
+    return tuple(sorted((task.period, task.util, task.high_criticality) for task in tasks))
+
+
+class TaskSetProfile(NamedTuple):
+    hyper_period: int
+    low_criticality_util: float
+    high_criticality_util: float
+    # EDF-VD slack; the server budget is max(0, slack).
+    slack: float
+    server_utilization: float
+    # Scaling factor x with the full server budget in use.
+    scaling_factor: float
+
+
+def scaling_factor(low_criticality_util: float, high_criticality_util: float, server_utilization: float) -> float:
+    if low_criticality_util >= 1:
+        return 0
+    return (high_criticality_util + server_utilization) / (1 - low_criticality_util)
+
+
+def task_set_profile(fingerprint: tuple[tuple[int, float, bool], ...]) -> TaskSetProfile:
+    # fsum is exactly rounded, so the sums do not depend on the order the tasks were assigned in.
+    low_criticality_util = math.fsum(util for _, util, high_criticality in fingerprint if not high_criticality)
+    high_criticality_util = math.fsum(util for _, util, high_criticality in fingerprint if high_criticality)
+    slack = (
+        (1 - low_criticality_util) * (1 - 2 * high_criticality_util) - low_criticality_util * high_criticality_util
+    )
+    server_utilization = max(0, slack)
+    return TaskSetProfile(
+        hyper_period=math.lcm(*[period for period, _, _ in fingerprint]),
+        low_criticality_util=low_criticality_util,
+        high_criticality_util=high_criticality_util,
+        slack=slack,
+        server_utilization=server_utilization,
+        scaling_factor=scaling_factor(low_criticality_util, high_criticality_util, server_utilization),
+    )
+
+
+class BoundedCache:
+    """Memo that evicts the least recently used entry once it holds `max_entries`."""
+
+    def __init__(self, max_entries: int = TASK_SET_CACHE_MAX_ENTRIES):
+        self.max_entries = max_entries
+        self.hits = 0
+        self.misses = 0
+        self._entries: OrderedDict[Hashable, object] = OrderedDict()
+
+    def get(self, key: Hashable, compute: Callable[[], T]) -> T:
+        entries = self._entries
+        if key in entries:
+            self.hits += 1
+            entries.move_to_end(key)
+            return entries[key]
+        self.misses += 1
+        value = entries[key] = compute()
+        if len(entries) > self.max_entries:
+            entries.popitem(last=False)
+        return value
+
+    def clear(self) -> None:
+        self._entries.clear()
+
+    def __len__(self) -> int:
+        return len(self._entries)
+
+
+class TaskSetCache:
+    """Quantities derived from task sets, memoized across every processor and trial of the process.
+
+    Everything cached is a pure function of its key, so a hit returns exactly what recomputing would.
+    Cached deadline tuples and schedule cycles are shared and must not be mutated.
+    """
+
+    def __init__(self, max_entries: int = TASK_SET_CACHE_MAX_ENTRIES):
+        self.profiles = BoundedCache(max_entries)
+        self.hyper_periods = BoundedCache(max_entries)
+        self.deadlines = BoundedCache(max_entries)
+        self.schedule_cycles = BoundedCache(max_entries)
+
+    def profile(self, tasks: Iterable[Task]) -> TaskSetProfile:
+        fingerprint = task_set_fingerprint(tasks)
+        return self.profiles.get(fingerprint, lambda: task_set_profile(fingerprint))
+
+    def hyper_period(self, periods: Iterable[int]) -> int:
+        periods = frozenset(periods)
+        return self.hyper_periods.get(periods, lambda: math.lcm(*periods))
+
+    def release_deadlines(self, period: int, relative_deadline: float, until: int) -> tuple[float, ...]:
+        return self.deadlines.get(
+            (period, relative_deadline, until),
+            lambda: tuple(release_time + relative_deadline for release_time in range(0, until, period)),
+        )
+
+    def clear(self) -> None:
+        for cache in (self.profiles, self.hyper_periods, self.deadlines, self.schedule_cycles):
+            cache.clear()
+
+
+task_set_cache = TaskSetCache()
@@ -1,101 +1,92 @@
-from main import schedule, AllocationException
-import matplotlib.pyplot as plt
+from experiment import ExperimentRunner, format_table
+from main import schedule
+from config import FIGURES_PATH, RESULTS_PATH
+from plots import save_figure
+from results import ResultStore
+from tracing import Verbosity
+import os
 
+QOS_TARGET_CI = 2.0
+QOS_MAX_TRIALS = 200
+SCHEDULABILITY_TARGET_CI = 0.05
+SCHEDULABILITY_TRIALS_PER_POINT = 100
 
-def part_one(overrun_prob):
+
+def part_one(runner: ExperimentRunner, overrun_prob):
     number_of_aperiodic_jobs = 40
     num_of_processors = [2, 4, 8, 16]
-    quality_of_services = []
-
-    for num in num_of_processors:
-        try:
-            qos = schedule(overrun_probability=overrun_prob, number_of_processors=num, sum_util=0.5 * num,
-                           number_of_aperiodic_jobs=number_of_aperiodic_jobs)
-            quality_of_services.append(qos)
-        except Exception as e:
-            print(e)
-
-    plt.plot(num_of_processors, quality_of_services)
-
-    plt.xlabel('num_of_processors')
-    plt.ylabel('quality_of_service')
+    points = [
+        dict(overrun_probability=overrun_prob, number_of_processors=num, sum_util=0.5 * num,
+             number_of_aperiodic_jobs=number_of_aperiodic_jobs)
+        for num in num_of_processors
+    ]
+    summaries = runner.run_adaptive(points, target_ci=QOS_TARGET_CI, max_trials=QOS_MAX_TRIALS)
+    print(format_table(summaries))
 
-    plt.title(f"overrun probability {overrun_prob}")
+    save_figure(os.path.join(FIGURES_PATH, f"part_one_overrun_{overrun_prob}.png"), num_of_processors, summaries,
+                x_label='num_of_processors', title=f"overrun probability {overrun_prob}")
 
-    plt.show()
 
-
-def part_two(overrun_prob):
+def part_two(runner: ExperimentRunner, overrun_prob):
     number_of_processors = 8
     nums_of_aperiodic_jobs = [40, 80, 120, 160]
-    quality_of_services = []
-
-    for num in nums_of_aperiodic_jobs:
-        try:
-            qos = schedule(overrun_probability=overrun_prob, number_of_processors=number_of_processors,
-                           sum_util=0.5 * number_of_processors, number_of_aperiodic_jobs=num)
-            quality_of_services.append(qos)
-        except Exception as e:
-            print(e)
-
-    plt.plot(nums_of_aperiodic_jobs, quality_of_services)
+    points = [
+        dict(overrun_probability=overrun_prob, number_of_processors=number_of_processors,
+             sum_util=0.5 * number_of_processors, number_of_aperiodic_jobs=num)
+        for num in nums_of_aperiodic_jobs
+    ]
+    summaries = runner.run_adaptive(points, target_ci=QOS_TARGET_CI, max_trials=QOS_MAX_TRIALS)
+    print(format_table(summaries))
 
-    plt.xlabel('nums_of_aperiodic_jobs')
-    plt.ylabel('quality_of_service')
+    save_figure(os.path.join(FIGURES_PATH, f"part_two_overrun_{overrun_prob}.png"), nums_of_aperiodic_jobs,
+                summaries, x_label='nums_of_aperiodic_jobs', title=f"overrun probability {overrun_prob}")
 
-    plt.title(f"overrun probability {overrun_prob}")
 
-    plt.show()
-
-
-def section_two(number_of_processors):
+def section_two(runner: ExperimentRunner, number_of_processors):
     sum_utils = [0.25, 0.5, 0.6, 0.75]
-    schedulablity = []
-    for util in sum_utils:
-        count = 0
-        for i in range(100):
-            try:
-                schedule(overrun_probability=0.2, number_of_processors=number_of_processors,
-                         sum_util=util * number_of_processors, number_of_aperiodic_jobs=0)
-                count += 1
-            except AllocationException:
-                pass
-        schedulablity.append(count)
-
-    plt.plot(sum_utils, schedulablity)
-
-    plt.xlabel('sum_utils')
-    plt.ylabel('schedulablity')
-
-    plt.title(f"number_of_processors {number_of_processors}")
-
-    plt.show()
+    points = [
+        dict(overrun_probability=0.2, number_of_processors=number_of_processors,
+             sum_util=util * number_of_processors, number_of_aperiodic_jobs=0, schedulability_only=True)
+        for util in sum_utils
+    ]
+    # The obvious points stop early, and the trials they save go to the ones near the schedulability edge.
+    summaries = runner.run_adaptive(points, target_ci=SCHEDULABILITY_TARGET_CI,
+                                    max_trials=4 * SCHEDULABILITY_TRIALS_PER_POINT,
+                                    budget=SCHEDULABILITY_TRIALS_PER_POINT * len(points))
+    print(format_table(summaries))
+    # Points ran different numbers of trials, so their ratios are compared rather than counts. The plot keeps
+    # the original metric, allocation success; the table also prints the stricter EDF-VD test's ratio.
+    save_figure(os.path.join(FIGURES_PATH, f"section_two_processors_{number_of_processors}.png"), sum_utils,
+                summaries, x_label='sum_utils', title=f"number_of_processors {number_of_processors}",
+                ratio="allocated")
 
 
 def run_scenarios():
+    runner = ExperimentRunner(cross_check_every=10, store=ResultStore(RESULTS_PATH))
+
     # section 1
 
-    part_one(overrun_prob=0.2)
-    part_one(overrun_prob=0.1)
-    part_one(overrun_prob=0.01)
+    part_one(runner, overrun_prob=0.2)
+    part_one(runner, overrun_prob=0.1)
+    part_one(runner, overrun_prob=0.01)
 
-    part_two(overrun_prob=0.2)
-    part_two(overrun_prob=0.1)
-    part_two(overrun_prob=0.01)
+    part_two(runner, overrun_prob=0.2)
+    part_two(runner, overrun_prob=0.1)
+    part_two(runner, overrun_prob=0.01)
 
     schedule(overrun_probability=0.2, number_of_processors=8, sum_util=0.5 * 8, number_of_aperiodic_jobs=0,
-             should_print=True)
+             verbosity=Verbosity.TRACE)
     schedule(overrun_probability=0.1, number_of_processors=8, sum_util=0.5 * 8, number_of_aperiodic_jobs=0,
-             should_print=True)
+             verbosity=Verbosity.TRACE)
     schedule(overrun_probability=0.01, number_of_processors=8, sum_util=0.5 * 8, number_of_aperiodic_jobs=0,
-             should_print=True)
+             verbosity=Verbosity.TRACE)
 
     # section 2
 
-    section_two(number_of_processors=2)
-    section_two(number_of_processors=4)
-    section_two(number_of_processors=8)
-    section_two(number_of_processors=16)
+    section_two(runner, number_of_processors=2)
+    section_two(runner, number_of_processors=4)
+    section_two(runner, number_of_processors=8)
+    section_two(runner, number_of_processors=16)
 
 
 if __name__ == "__main__":
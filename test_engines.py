@@ -0,0 +1,49 @@
+from itertools import count
+
+from engine import EDFEngine
+from job import Job, PeriodicJob
+from processor import Processor
+from task import Task
+
+
+class Draws:
+    """Stands in for a random.Random whose random() returns the given values in turn."""
+
+    def __init__(self, values: list[float]):
+        self._values = iter(values)
+
+    def random(self) -> float:
+        return next(self._values)
+
+
+def dropped_aperiodic_jobs() -> tuple[Task, Job, Job]:
+    # A starts at 5, is preempted at 10 by the task's overrunning second instance and dropped by the switch to HI
+    # mode; B needs more budget than A leaves, so it only fits if the drop gave A's share back.
+    ids = count(start=1)
+    task = Task(period=10, util=0.2, execution_time=2, high_criticality=True, id_counter=ids)
+    return (
+        task,
+        Job(release_time=5, deadline=25, execution_time=6, id_counter=ids),
+        Job(release_time=15, deadline=35, execution_time=10, id_counter=ids),
+    )
+
+
+def test_dropped_aperiodic_job_returns_its_budget():
+    task, a, b = dropped_aperiodic_jobs()
+    periodic_jobs = PeriodicJob.from_releases(task, range(0, 40, 10), [10, 20, 30, 40], [False, True, False, False])
+    engine = EDFEngine(periodic_jobs + [a, b], server_utilization=0.6)
+    engine.run()
+    assert a.dropped
+    assert not b.dropped and b.finish_time is not None
+    assert engine.server_utilization == 0.6
+
+
+def test_try_admit_after_dropped_aperiodic_job():
+    task, a, b = dropped_aperiodic_jobs()
+    processor = Processor(0.5, rng=Draws([0.9, 0.1, 0.9, 0.9]))
+    processor.assign_task(task)
+    processor.server_utilization = 0.6
+    processor.prepare_schedule(until=40)
+    assert processor.try_admit(a)
+    assert processor.try_admit(b)
+    assert a.dropped and not b.dropped
@@ -0,0 +1,187 @@
+import random
+from itertools import count
+
+import pytest
+
+from engine import EDFEngine, ServerUtilizationException
+from job import Job, PeriodicJob
+from metrics import SchedulerMetrics
+from processor import CycleEDFEngine, Processor
+from task import Task
+
+# Random single processor schedules: each engine is compared against a plain EDFEngine run over fresh copies of
+# the same jobs.
+SEEDS = range(40)
+PERIODS = [10, 20, 25, 40, 50]
+METRICS = ["dispatches", "preemptions", "ready_queue_size_total", "max_ready_queue_size", "mode_switches"]
+
+
+def random_processor(seed: int) -> tuple[Processor, int, list[Job]]:
+    """A processor with a random task set, a horizon of a few hyper periods and aperiodic jobs within it."""
+    rng = random.Random(seed)
+    ids = count(start=1)
+    processor = Processor(rng.choice([0.0, 0.1, 0.3]), rng=random.Random(seed), job_ids=ids)
+    for _ in range(rng.randint(1, 5)):
+        period = rng.choice(PERIODS)
+        util = rng.uniform(0.02, 0.15)
+        processor.assign_task(Task(period=period, util=util, execution_time=util * period,
+                                   high_criticality=rng.random() < 0.5, id_counter=ids))
+    processor.calculate_server_utilization()
+    processor.server_utilization = rng.choice([processor.server_utilization, rng.uniform(0.2, 0.8)])
+    until = processor.hyper_period * rng.randint(1, 4)
+    aperiodic_jobs = []
+    for _ in range(rng.randint(0, 8)):
+        release_time = rng.randint(0, until)
+        relative_deadline = rng.randint(5, 60)
+        aperiodic_jobs.append(Job(release_time=release_time, deadline=release_time + relative_deadline,
+                                  execution_time=relative_deadline * rng.uniform(0.05, 0.4), id_counter=ids))
+    aperiodic_jobs.sort(key=lambda job: job.release_time)
+    return processor, until, aperiodic_jobs
+
+
+def fresh_copies(jobs: list[Job]) -> list[Job]:
+    return [
+        PeriodicJob(job.task, job.release_time, job.deadline, job.instance_number, job.will_overrun)
+        if job.is_periodic else Job(job.release_time, job.deadline, job.execution_time)
+        for job in jobs
+    ]
+
+
+def job_key(job: Job) -> tuple:
+    if job.is_periodic:
+        return job.task.id, job.instance_number
+    return job.release_time, job.deadline, job.execution_time
+
+
+def schedule_of(jobs: list[Job]) -> dict[tuple, tuple[list[float], bool]]:
+    return {job_key(job): (job.record.intervals, job.dropped) for job in jobs}
+
+
+def assert_same_schedule(jobs: list[Job], expected: list[Job]) -> None:
+    schedule, expected_schedule = schedule_of(jobs), schedule_of(expected)
+    assert schedule.keys() == expected_schedule.keys()
+    for key, (intervals, dropped) in expected_schedule.items():
+        assert schedule[key] == (pytest.approx(intervals, abs=1e-9), dropped), key
+
+
+def plain_run(jobs: list[Job], server_utilization: float) -> tuple[EDFEngine | None, SchedulerMetrics]:
+    """The reference run, or None for the engine if it ran out of server budget."""
+    metrics = SchedulerMetrics()
+    engine = EDFEngine(fresh_copies(jobs), server_utilization, metrics=metrics)
+    try:
+        engine.run()
+    except ServerUtilizationException:
+        return None, metrics
+    return engine, metrics
+
+
+@pytest.mark.parametrize("seed", SEEDS)
+def test_mode_machine_in_full_run(seed):
+    # The reference itself: only the LO/HI mode machine drops jobs, and every job gives its budget back.
+    processor, until, aperiodic_jobs = random_processor(seed)
+    jobs = processor.create_all_jobs(until) + aperiodic_jobs
+    full, metrics = plain_run(jobs, processor.server_utilization)
+    if full is None:
+        return
+    dropped = [job for job in full.scheduled_jobs if job.dropped]
+    assert not any(job.is_periodic and job.task.high_criticality for job in dropped)
+    overruns = sum(job.is_periodic and job.task.high_criticality and job.will_overrun for job in jobs)
+    assert full.mode_switches <= overruns
+    assert full.mode_switches > 0 or not dropped
+    assert metrics.mode_switches == full.mode_switches
+    assert full.server_utilization == pytest.approx(processor.server_utilization)
+
+
+@pytest.mark.parametrize("seed", SEEDS)
+def test_resumed_engine_matches_full_run(seed):
+    processor, until, aperiodic_jobs = random_processor(seed)
+    jobs = processor.create_all_jobs(until) + aperiodic_jobs
+    full, _ = plain_run(jobs, processor.server_utilization)
+    if full is None:
+        return
+    rng = random.Random(seed)
+    idle = [checkpoint for checkpoint in full.checkpoints if checkpoint.released_until == checkpoint.clock]
+    if not idle:
+        return
+    checkpoint = rng.choice(idle)
+    copies = fresh_copies(jobs)
+    release_queue = sorted(
+        ((job.release_time, index, job) for index, job in enumerate(copies)
+         if job.release_time > checkpoint.released_until),
+        key=lambda e: (e[0], e[1]),
+    )
+    resumed = EDFEngine.resume(release_queue, checkpoint)
+    assert_same_schedule(resumed.run(), full.scheduled_jobs[checkpoint.scheduled_count:])
+    assert resumed.mode_switches == full.mode_switches
+    assert resumed.server_utilization == pytest.approx(full.server_utilization)
+
+
+@pytest.mark.parametrize("seed", SEEDS)
+def test_cycle_engine_matches_full_run(seed):
+    processor, until, aperiodic_jobs = random_processor(seed)
+    jobs = processor.create_all_jobs(until) + aperiodic_jobs
+    full, expected_metrics = plain_run(jobs, processor.server_utilization)
+    processor.metrics = SchedulerMetrics()
+    engine = processor.create_engine(jobs, until)
+    if full is None:
+        with pytest.raises(ServerUtilizationException):
+            engine.run()
+        return
+    assert_same_schedule(engine.run(), full.scheduled_jobs)
+    for name in METRICS:
+        assert getattr(processor.metrics, name) == getattr(expected_metrics, name), name
+
+
+def test_cycle_engine_is_exercised():
+    engines = []
+    for seed in SEEDS:
+        processor, until, _ = random_processor(seed)
+        engines.append(processor.create_engine(processor.create_all_jobs(until), until))
+    assert any(isinstance(engine, CycleEDFEngine) for engine in engines)
+
+
+@pytest.mark.parametrize("seed", SEEDS)
+def test_try_admit_matches_full_rerun(seed):
+    processor, until, aperiodic_jobs = random_processor(seed)
+    processor.prepare_schedule(until=until)
+    # The periodic jobs in creation order, as edf_schedule lists them.
+    periodic_jobs = fresh_copies(sorted(processor.scheduled_jobs, key=lambda job: job.id))
+    admitted = []
+    for job in aperiodic_jobs:
+        full, _ = plain_run(periodic_jobs + admitted + [job], processor.server_utilization)
+        assert processor.try_admit(job) == (full is not None)
+        if full is not None:
+            admitted.append(job)
+
+    full, _ = plain_run(periodic_jobs + admitted, processor.server_utilization)
+    assert_same_schedule(processor.scheduled_jobs, full.scheduled_jobs)
+    processor.metrics = SchedulerMetrics()
+    processor.record_schedule_metrics()
+    assert processor.metrics.mode_switches == full.mode_switches
+    assert processor.metrics.dropped_jobs == sum(job.dropped for job in full.scheduled_jobs)
+
+
+@pytest.mark.parametrize("seed", SEEDS)
+def test_online_engine_matches_full_run(seed):
+    processor, until, aperiodic_jobs = random_processor(seed)
+    periodic_jobs = processor.create_all_jobs(until)
+    full, expected_metrics = plain_run(periodic_jobs + aperiodic_jobs, processor.server_utilization)
+    overruns = {(job.task.id, job.instance_number): job.will_overrun for job in periodic_jobs}
+    processor.metrics = SchedulerMetrics()
+    engine = processor.create_online_engine(
+        until=until, history=None, overrun=lambda task, instance_number: overruns[(task.id, instance_number)]
+    )
+    try:
+        for job in fresh_copies(aperiodic_jobs):
+            engine.run_until(job.release_time)
+            engine.submit(job)
+        while engine.step():
+            pass
+    except ServerUtilizationException:
+        assert full is None
+        return
+    assert full is not None
+    assert_same_schedule(engine.scheduled_jobs, full.scheduled_jobs)
+    assert engine.mode_switches == full.mode_switches
+    for name in METRICS:
+        assert getattr(processor.metrics, name) == getattr(expected_metrics, name), name
@@ -0,0 +1,202 @@
+import struct
+import sys
+from enum import IntEnum
+from typing import BinaryIO, Iterator, NamedTuple, TextIO
+
+from config import ERROR_MARGIN, TRACE_BUFFER_SIZE
+from job import Job
+
+
+class Verbosity(IntEnum):
+    QUIET = 0
+    # Processors, task lists and scheduling phases.
+    SUMMARY = 1
+    # Every execution interval as well.
+    TRACE = 2
+
+
+class TraceRecord(NamedTuple):
+    processor_id: int
+    job_id: int
+    task_id: int
+    instance_number: int
+    start: float
+    finish: float
+    remaining_execution_time: float
+    dropped: bool
+    will_overrun: bool
+
+
+def trace_record(processor_id: int, job: Job, start: float, finish: float) -> TraceRecord:
+    # Aperiodic jobs have no task, so they are written with task 0 and instance 0.
+    periodic = job.is_periodic
+    return TraceRecord(
+        processor_id=processor_id,
+        job_id=job.id,
+        task_id=job.task.id if periodic else 0,
+        instance_number=job.instance_number if periodic else 0,
+        start=start,
+        finish=finish,
+        remaining_execution_time=job.record.remaining_execution_time,
+        dropped=job.record.dropped,
+        will_overrun=job.will_overrun if periodic else False,
+    )
+
+
+class BufferedWriter:
+    """Collects encoded records and writes them to `stream` once about `buffer_size` bytes are pending."""
+
+    def __init__(self, stream: TextIO | BinaryIO, buffer_size: int = TRACE_BUFFER_SIZE):
+        self.stream = stream
+        self.buffer_size = buffer_size
+        self._chunks: list = []
+        self._size = 0
+
+    def write(self, data: str | bytes) -> None:
+        self._chunks.append(data)
+        self._size += len(data)
+        if self._size >= self.buffer_size:
+            self.flush()
+
+    def flush(self) -> None:
+        if self._chunks:
+            self.stream.write(self._chunks[0][:0].join(self._chunks))
+            self._chunks.clear()
+            self._size = 0
+        self.stream.flush()
+
+
+class TraceSink:
+    """Receives execution intervals in the order the engine closes them.
+
+    Dropped jobs arrive as a zero length interval at their release time when they are dropped.
+    """
+
+    binary = False
+
+    def __init__(self, stream: TextIO | BinaryIO, buffer_size: int = TRACE_BUFFER_SIZE, owns_stream: bool = False):
+        self.writer = BufferedWriter(stream, buffer_size)
+        self.owns_stream = owns_stream
+        self.write_header()
+
+    @classmethod
+    def open(cls, path: str, buffer_size: int = TRACE_BUFFER_SIZE) -> "TraceSink":
+        stream = open(path, "wb") if cls.binary else open(path, "w", newline="")
+        return cls(stream, buffer_size, owns_stream=True)
+
+    def write_header(self) -> None:
+        pass
+
+    def write(self, processor_id: int, job: Job, start: float, finish: float) -> None:
+        raise NotImplementedError
+
+    def close(self) -> None:
+        self.writer.flush()
+        if self.owns_stream:
+            self.writer.stream.close()
+
+    def __enter__(self) -> "TraceSink":
+        return self
+
+    def __exit__(self, *exc_info) -> None:
+        self.close()
+
+
+class CsvTraceSink(TraceSink):
+    def write_header(self) -> None:
+        self.writer.write(",".join(TraceRecord._fields) + "\n")
+
+    def write(self, processor_id: int, job: Job, start: float, finish: float) -> None:
+        record = trace_record(processor_id, job, start, finish)
+        self.writer.write(
+            f"{record.processor_id},{record.job_id},{record.task_id},{record.instance_number},"
+            f"{record.start},{record.finish},{record.remaining_execution_time},"
+            f"{int(record.dropped)},{int(record.will_overrun)}\n"
+        )
+
+
+class JsonLinesTraceSink(TraceSink):
+    def write(self, processor_id: int, job: Job, start: float, finish: float) -> None:
+        record = trace_record(processor_id, job, start, finish)
+        self.writer.write(
+            f'{{"processor_id":{record.processor_id},"job_id":{record.job_id},"task_id":{record.task_id},'
+            f'"instance_number":{record.instance_number},"start":{record.start},"finish":{record.finish},'
+            f'"remaining_execution_time":{record.remaining_execution_time},'
+            f'"dropped":{"true" if record.dropped else "false"},'
+            f'"will_overrun":{"true" if record.will_overrun else "false"}}}\n'
+        )
+
+
+BINARY_TRACE_RECORD = struct.Struct("<IIIIddd??")
+
+
+class BinaryTraceSink(TraceSink):
+    """Fixed size little-endian records laid out as BINARY_TRACE_RECORD, read back with read_binary_trace."""
+
+    binary = True
+
+    def write(self, processor_id: int, job: Job, start: float, finish: float) -> None:
+        self.writer.write(BINARY_TRACE_RECORD.pack(*trace_record(processor_id, job, start, finish)))
+
+
+def read_binary_trace(stream: BinaryIO) -> Iterator[TraceRecord]:
+    data = stream.read()
+    for fields in BINARY_TRACE_RECORD.iter_unpack(data):
+        yield TraceRecord(*fields)
+
+
+class ConsoleTraceSink(TraceSink):
+    """The human readable report the scheduler used to print after each schedule."""
+
+    def __init__(self, stream: TextIO | None = None, buffer_size: int = TRACE_BUFFER_SIZE):
+        super().__init__(stream or sys.stdout, buffer_size)
+
+    def write(self, processor_id: int, job: Job, start: float, finish: float) -> None:
+        if job.is_periodic:
+            description = (
+                f"JOB={job.id} TASK={job.task.id} INSTANCE_NUMBER={job.instance_number} PERIOD={job.task.period}\n"
+                f"OVERRUN={job.will_overrun} IS_DROPPED={job.dropped}\n"
+                f"RELEASE={job.release_time} DEADLINE={job.deadline} EXEC_TIME={job.task.execution_time}\n"
+            )
+        else:
+            description = (
+                f"JOB={job.id}\n"
+                f"RELEASE={job.release_time} DEADLINE={job.deadline} EXEC_TIME={job.execution_time}\n"
+            )
+        remaining_execution_time = job.record.remaining_execution_time
+        if remaining_execution_time > ERROR_MARGIN:
+            status = f"TASK WAS PREEMPTED, REMAINING EXECUTION TIME IS {remaining_execution_time}.\n"
+        else:
+            status = "EXECUTION OF TASK WAS FINISHED.\n"
+        self.writer.write(
+            f"{'-' * 100}\nEXECUTED\n{description}FROM {start} TO {finish} FOR {finish - start} SECONDS.\n{status}"
+        )
+
+
+class Trace:
+    """Verbosity level plus the sink that execution intervals go to at Verbosity.TRACE."""
+
+    def __init__(self, verbosity: Verbosity = Verbosity.QUIET, sink: TraceSink | None = None):
+        self.verbosity = verbosity
+        self.sink = sink if sink is not None or verbosity < Verbosity.TRACE else ConsoleTraceSink()
+
+    def enabled(self, verbosity: Verbosity) -> bool:
+        return self.verbosity >= verbosity
+
+    @property
+    def traces_intervals(self) -> bool:
+        return self.sink is not None and self.verbosity >= Verbosity.TRACE
+
+    def log(self, verbosity: Verbosity, *lines) -> None:
+        if self.verbosity >= verbosity:
+            if self.sink is not None:
+                self.sink.writer.flush()
+            for line in lines:
+                print(line)
+
+    def flush(self) -> None:
+        if self.sink is not None:
+            self.sink.writer.flush()
+
+
+QUIET = Trace()
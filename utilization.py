@@ -0,0 +1,113 @@
+import random
+import sys
+
+UUNIFAST_DISCARD = "uunifast-discard"
+RANDFIXEDSUM = "randfixedsum"
+
+
+def uunifast_discard_batch(
+        tasks_count: int,
+        utilization: float,
+        count: int,
+        rng: random.Random = random,
+        max_candidates: int = 100_000,
+        batch_size: int = 4096,
+) -> list[list[float]]:
+    """Returns up to `count` UUniFast vectors whose utilizations are all at most 1.
+
+    Candidates are generated a batch at a time, one task column per step, and a candidate is
+    discarded as soon as one of its utilizations exceeds 1 instead of after the whole vector
+    has been drawn. Fewer than `count` vectors are returned if `max_candidates` runs out.
+    """
+    if tasks_count < 1 or utilization > tasks_count:
+        return []
+    if utilization >= tasks_count:
+        # Every task at utilization 1 is the only vector left, and rejection sampling would never draw it.
+        return [[1.0] * tasks_count for _ in range(count)]
+    random_ = rng.random
+    vectors: list[list[float]] = []
+    candidates = 0
+    next_size = 2 * count + 16
+    while len(vectors) < count and candidates < max_candidates:
+        size = min(next_size, batch_size, max_candidates - candidates)
+        next_size *= 2
+        candidates += size
+        rows: list[list[float]] = [[] for _ in range(size)]
+        sums = [utilization] * size
+        for column in range(tasks_count - 1):
+            exponent = 1 / (tasks_count - 1 - column)
+            next_sums = [utilization_sum * random_() ** exponent for utilization_sum in sums]
+            kept_rows, kept_sums = [], []
+            for row, utilization_sum, next_utilization_sum in zip(rows, sums, next_sums):
+                util = utilization_sum - next_utilization_sum
+                if util <= 1:
+                    row.append(util)
+                    kept_rows.append(row)
+                    kept_sums.append(next_utilization_sum)
+            rows, sums = kept_rows, kept_sums
+        for row, utilization_sum in zip(rows, sums):
+            if utilization_sum <= 1:
+                row.append(utilization_sum)
+                vectors.append(row)
+    return vectors[:count]
+
+
+def randfixedsum(tasks_count: int, utilization: float, count: int, rng: random.Random = random) -> list[list[float]]:
+    """Stafford's RandFixedSum: `count` vectors uniformly distributed over utilizations in [0, 1] summing to
+    `utilization`.
+
+    It draws from the same distribution as UUniFast-Discard but never rejects a vector, so it stays fast when
+    the total utilization approaches the number of tasks.
+    """
+    n = tasks_count
+    if n < 1 or not 0 <= utilization <= n:
+        raise ValueError(f"utilization {utilization} is not reachable with {tasks_count} tasks")
+    if n == 1:
+        return [[utilization] for _ in range(count)]
+
+    k = min(int(utilization), n - 1)
+    s1 = [utilization - (k - i) for i in range(n)]
+    s2 = [(k + n - i) - utilization for i in range(n)]
+    w = [[0.0] * (n + 1) for _ in range(n)]
+    w[0][1] = sys.float_info.max
+    t = [[0.0] * n for _ in range(n - 1)]
+    for i in range(2, n + 1):
+        for m in range(i):
+            tmp1 = w[i - 2][m + 1] * s1[m] / i
+            tmp2 = w[i - 2][m] * s2[n - i + m] / i
+            w[i - 1][m + 1] = tmp1 + tmp2
+            tmp3 = w[i - 1][m + 1] + sys.float_info.min
+            t[i - 2][m] = tmp2 / tmp3 if s2[n - i + m] > s1[m] else 1 - tmp1 / tmp3
+
+    random_ = rng.random
+    vectors = []
+    for _ in range(count):
+        x = [0.0] * n
+        remaining, j, sm, pr = utilization, k + 1, 0.0, 1.0
+        for i in range(n - 1, 0, -1):
+            e = random_() <= t[i - 1][j - 1]
+            sx = random_() ** (1 / i)
+            sm += (1 - sx) * pr * remaining / (i + 1)
+            pr *= sx
+            x[n - i - 1] = sm + pr * e
+            remaining -= e
+            j -= e
+        x[n - 1] = sm + pr * remaining
+        rng.shuffle(x)
+        vectors.append(x)
+    return vectors
+
+
+def sample_utilizations(
+        tasks_count: int,
+        utilization: float,
+        count: int,
+        rng: random.Random = random,
+        method: str = UUNIFAST_DISCARD,
+        max_candidates: int = 100_000,
+) -> list[list[float]]:
+    if method == UUNIFAST_DISCARD:
+        return uunifast_discard_batch(tasks_count, utilization, count, rng, max_candidates)
+    if method == RANDFIXEDSUM:
+        return randfixedsum(tasks_count, utilization, count, rng)
+    raise ValueError(f"unknown utilization sampler {method!r}")
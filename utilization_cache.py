@@ -0,0 +1,81 @@
+import json
+import os
+import sqlite3
+from collections import OrderedDict
+
+from config import UUNIFAST_CACHE_PATH, UUNIFAST_CACHE_MAX_KEYS, UUNIFAST_CACHE_MAX_SAMPLES
+
+
+class UtilizationCache:
+    """Pool of valid UUniFast utilization vectors keyed by (tasks_count, utilization).
+
+    Vectors are appended to an SQLite table, which serializes concurrent writers from several
+    processes through its file lock. Recently used keys are kept in memory.
+    """
+
+    def __init__(
+            self,
+            path: str = UUNIFAST_CACHE_PATH,
+            max_samples: int = UUNIFAST_CACHE_MAX_SAMPLES,
+            max_keys: int = UUNIFAST_CACHE_MAX_KEYS,
+    ):
+        self.path = path
+        self.max_samples = max_samples
+        self.max_keys = max_keys
+        self._samples: OrderedDict[tuple[int, float], list[list[float]]] = OrderedDict()
+        self._connection: sqlite3.Connection | None = None
+        self._pid: int | None = None
+
+    @property
+    def connection(self) -> sqlite3.Connection:
+        # A connection must not be shared with a forked worker, so each process opens its own.
+        if self._connection is None or self._pid != os.getpid():
+            self._connection = sqlite3.connect(self.path, timeout=60, isolation_level=None)
+            self._connection.execute("PRAGMA journal_mode=WAL")
+            self._connection.execute(
+                "CREATE TABLE IF NOT EXISTS uunifast ("
+                "tasks_count INTEGER NOT NULL, utilization REAL NOT NULL, utils TEXT NOT NULL)"
+            )
+            self._connection.execute(
+                "CREATE INDEX IF NOT EXISTS uunifast_key ON uunifast (tasks_count, utilization)"
+            )
+            self._pid = os.getpid()
+            self._samples.clear()
+        return self._connection
+
+    def close(self) -> None:
+        """Closes this process's connection; the next use reopens it at `path`."""
+        if self._connection is not None and self._pid == os.getpid():
+            self._connection.close()
+        self._connection = None
+        self._pid = None
+        self._samples.clear()
+
+    def samples(self, tasks_count: int, utilization: float) -> list[list[float]]:
+        key = (tasks_count, utilization)
+        samples = self._samples.get(key)
+        if samples is None:
+            rows = self.connection.execute(
+                "SELECT utils FROM uunifast WHERE tasks_count = ? AND utilization = ? LIMIT ?",
+                (tasks_count, utilization, self.max_samples),
+            )
+            samples = [json.loads(utils) for utils, in rows]
+            self._samples[key] = samples
+            if len(self._samples) > self.max_keys:
+                self._samples.popitem(last=False)
+        else:
+            self._samples.move_to_end(key)
+        return samples
+
+    def add(self, tasks_count: int, utilization: float, utils: list[float]) -> None:
+        samples = self.samples(tasks_count, utilization)
+        if len(samples) >= self.max_samples:
+            return
+        self.connection.execute(
+            "INSERT INTO uunifast (tasks_count, utilization, utils) VALUES (?, ?, ?)",
+            (tasks_count, utilization, json.dumps(utils)),
+        )
+        samples.append(utils)
+
+
+utilization_cache = UtilizationCache()